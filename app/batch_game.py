@@ -0,0 +1,140 @@
+import numpy as np
+
+from app.game_core import Direction, TCoord, DX as DIRECTION_DX, DY as DIRECTION_DY, OPPOSITE as DIRECTION_OPPOSITE
+from app.profiling import timed
+from app.seeds import new_seed
+
+# Код направления - значение Direction, он же номер выхода нейросети
+DIRECTIONS = tuple(Direction)
+DX = np.array(DIRECTION_DX, dtype=np.int64)
+DY = np.array(DIRECTION_DY, dtype=np.int64)
+OPPOSITE = np.array(DIRECTION_OPPOSITE, dtype=np.int64)
+NO_ACTION = -1
+
+
+class BatchGame:
+    def __init__(self, count: int, width=10, height=10, start_coord: TCoord = (0, 0), seed=None):
+        self.count = count
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.capacity = self.size + 1
+        self.seed = seed if seed is not None else new_seed()
+        self.rng = np.random.default_rng(self.seed)
+        self.rows = np.arange(count)
+
+        # Клетка (x, y) хранится как y * width + x
+        start = start_coord[1] * width + start_coord[0]
+        self.grid = np.zeros((count, self.size), dtype=np.int8)
+        self.grid[:, start] = 1
+        self.body = np.zeros((count, self.capacity), dtype=np.int64)
+        self.body[:, 0] = start
+        self.head_index = np.zeros(count, dtype=np.int64)
+        self.tail_index = np.zeros(count, dtype=np.int64)
+        self.length = np.ones(count, dtype=np.int64)
+        self.direction = np.full(count, Direction.RIGHT, dtype=np.int64)
+        self.food = np.zeros(count, dtype=np.int64)
+        self.is_over = np.zeros(count, dtype=bool)
+
+        self.spawn_food(self.rows)
+
+    @property
+    def heads(self) -> np.ndarray:
+        return self.body[self.rows, self.head_index]
+
+    def step(self, actions=None) -> np.ndarray:
+        alive = ~self.is_over
+        if actions is not None:
+            actions = np.asarray(actions)
+            change = alive & (actions != NO_ACTION) & (actions != OPPOSITE[self.direction])
+            self.direction[change] = actions[change]
+
+        rows = np.flatnonzero(alive)
+        head = self.body[rows, self.head_index[rows]]
+        direction = self.direction[rows]
+        x = head % self.width + DX[direction]
+        y = head // self.width + DY[direction]
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        new_head = np.where(inside, y * self.width + x, 0)
+
+        # Хвост освобождает клетку в том же ходе, поэтому в него можно въехать
+        tail = self.body[rows, self.tail_index[rows]]
+        occupied = self.grid[rows, new_head] - (new_head == tail)
+        crashed = ~inside | (occupied > 0)
+        self.is_over[rows[crashed]] = True
+
+        moved = ~crashed
+        rows, new_head, tail = rows[moved], new_head[moved], tail[moved]
+        self.grid[rows, tail] -= 1
+        self.tail_index[rows] = (self.tail_index[rows] + 1) % self.capacity
+        self.head_index[rows] = (self.head_index[rows] + 1) % self.capacity
+        self.body[rows, self.head_index[rows]] = new_head
+        self.grid[rows, new_head] += 1
+
+        eaten = rows[new_head == self.food[rows]]
+        full = self.length[eaten] == self.size
+        self.is_over[eaten[full]] = True
+        eaten = eaten[~full]
+        self.spawn_food(eaten)
+        self.grow(eaten)
+
+        return alive & ~self.is_over
+
+    @timed('batch_game.get_data')
+    def get_data(self, out: np.ndarray | None = None) -> np.ndarray:
+        if out is None:
+            out = np.zeros((self.count, 13))
+        head = self.heads
+        x = head % self.width
+        y = head // self.width
+        food_x = self.food % self.width
+        food_y = self.food // self.width
+
+        out[:, 0:4] = self.direction[:, None] == np.arange(4)
+        out[:, 4] = x < food_x
+        out[:, 5] = x > food_x
+        out[:, 6] = y < food_y
+        out[:, 7] = y > food_y
+        out[:, 8] = self.length - 1
+
+        # Лучи от головы: ближайший сегмент в том же столбце/строке, иначе стена
+        grid = self.grid.reshape(self.count, self.height, self.width)
+        ys = np.arange(self.height)
+        xs = np.arange(self.width)
+        column = grid[self.rows[:, None], ys[None, :], x[:, None]] > 0
+        row = grid[self.rows[:, None], y[:, None], xs[None, :]] > 0
+
+        upper = np.where(column & (ys < y[:, None]), ys, -1).max(axis=1)
+        out[:, 9] = np.where(upper >= 0, y - upper, y)
+        lower = np.where(column & (ys > y[:, None]), ys, self.height).min(axis=1)
+        out[:, 10] = lower - y
+        left = np.where(row & (xs < x[:, None]), xs, -1).max(axis=1)
+        out[:, 11] = np.where(left >= 0, x - left, x)
+        right = np.where(row & (xs > x[:, None]), xs, self.width).min(axis=1)
+        out[:, 12] = right - x
+        return out
+
+    def spawn_food(self, rows: np.ndarray):
+        if not len(rows):
+            return
+        free = self.grid[rows] == 0
+        free_counts = free.sum(axis=1)
+        choices = (self.rng.random(len(rows)) * free_counts).astype(np.int64)
+        self.food[rows] = np.argmax(np.cumsum(free, axis=1) > choices[:, None], axis=1)
+
+    def grow(self, rows: np.ndarray):
+        tail = self.body[rows, self.tail_index[rows]]
+        self.tail_index[rows] = (self.tail_index[rows] - 1) % self.capacity
+        self.body[rows, self.tail_index[rows]] = tail
+        self.grid[rows, tail] += 1
+        self.length[rows] += 1
+
+    def to_coord(self, cell: int) -> TCoord:
+        return int(cell % self.width), int(cell // self.width)
+
+    def get_food(self, i: int) -> TCoord:
+        return self.to_coord(self.food[i])
+
+    def get_body(self, i: int) -> list[TCoord]:
+        indexes = (self.head_index[i] - np.arange(self.length[i])) % self.capacity
+        return [self.to_coord(cell) for cell in self.body[i, indexes]]
@@ -0,0 +1,86 @@
+import numpy as np
+from neat.graphs import feed_forward_layers
+
+from app.profiling import timed
+
+# Функции активации neat-python в векторном виде
+ACTIVATIONS = {
+    'tanh': lambda z: np.tanh(np.clip(2.5 * z, -60.0, 60.0)),
+    'sigmoid': lambda z: 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0))),
+    'relu': lambda z: np.maximum(z, 0.0),
+    'identity': lambda z: z,
+}
+
+
+class BatchNetwork:
+    def __init__(self, genomes, config):
+        genome_config = config.genome_config
+        self.input_keys = genome_config.input_keys
+        self.output_keys = genome_config.output_keys
+        self.count = len(genomes)
+
+        # Каждой сети отведена строка матрицы значений: сначала входы, потом выходы, потом скрытые узлы
+        columns = []
+        for genome in genomes:
+            keys = list(self.input_keys) + list(self.output_keys)
+            keys += [key for key in genome.nodes if key not in keys]
+            columns.append({key: i for i, key in enumerate(keys)})
+        self.width = max(len(c) for c in columns) if columns else len(self.input_keys) + len(self.output_keys)
+
+        layers: list[dict[str, list]] = []
+        for g, genome in enumerate(genomes):
+            connections = [cg.key for cg in genome.connections.values() if cg.enabled]
+            genome_layers = feed_forward_layers(self.input_keys, self.output_keys, connections)
+            for depth, layer in enumerate(genome_layers):
+                if depth == len(layers):
+                    layers.append({key: [] for key in ('node', 'bias', 'response', 'activation', 'src', 'dst', 'weight')})
+                arrays = layers[depth]
+                for node in layer:
+                    ng = genome.nodes[node]
+                    if ng.aggregation != 'sum':
+                        raise ValueError(f"Unsupported aggregation: {ng.aggregation}")
+                    if ng.activation not in ACTIVATIONS:
+                        raise ValueError(f"Unsupported activation: {ng.activation}")
+                    dst = g * self.width + columns[g][node]
+                    arrays['node'].append(dst)
+                    arrays['bias'].append(ng.bias)
+                    arrays['response'].append(ng.response)
+                    arrays['activation'].append(ng.activation)
+                    for inode, onode in connections:
+                        if onode == node:
+                            arrays['src'].append(g * self.width + columns[g][inode])
+                            arrays['dst'].append(dst)
+                            arrays['weight'].append(genome.connections[(inode, onode)].weight)
+
+        self.layers = []
+        for arrays in layers:
+            activations = np.array(arrays['activation'])
+            self.layers.append((
+                np.array(arrays['node'], dtype=np.int64),
+                np.array(arrays['bias'], dtype=np.float64),
+                np.array(arrays['response'], dtype=np.float64),
+                [(ACTIVATIONS[name], activations == name) for name in set(arrays['activation'])],
+                np.array(arrays['src'], dtype=np.int64),
+                np.array(arrays['dst'], dtype=np.int64),
+                np.array(arrays['weight'], dtype=np.float64),
+            ))
+
+        self.values = np.zeros(self.count * self.width)
+
+    @timed('network.activate')
+    def activate(self, inputs: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        if rows is None:
+            rows = np.arange(self.count)
+        values = self.values.reshape(self.count, self.width)
+        values[rows, :len(self.input_keys)] = inputs
+
+        for node, bias, response, activations, src, dst, weight in self.layers:
+            aggregated = np.bincount(dst, weights=self.values[src] * weight, minlength=len(self.values))[node]
+            z = bias + response * aggregated
+            result = np.empty_like(z)
+            for activation, mask in activations:
+                result[mask] = activation(z[mask])
+            self.values[node] = result
+
+        outputs = len(self.input_keys)
+        return values[rows, outputs:outputs + len(self.output_keys)]
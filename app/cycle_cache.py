@@ -0,0 +1,111 @@
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+
+from app.hamiltonian_cycle import HamiltonianCycle
+from app.seeds import derive_seed
+
+DEFAULT_CACHE_DIR = '.cycle_cache'
+EXTENSION = '.hcycle'
+
+# Заголовок: сигнатура, версия, ширина, высота, сид. Дальше два массива int32
+# по width * height элементов: порядок клеток в цикле и номер каждой клетки в цикле
+MAGIC = b'HCYC'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQ')
+CELL_SIZE = 4
+
+
+class CycleCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+
+    def size_directory(self, width, height) -> str:
+        return os.path.join(self.directory, f'{width}x{height}')
+
+    def path_for(self, width, height, seed) -> str:
+        return os.path.join(self.size_directory(width, height), f'{seed}{EXTENSION}')
+
+    def save(self, hc: HamiltonianCycle) -> str:
+        path = self.path_for(hc.width, hc.height, hc.seed)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        order = array('i', hc.get_order())
+        node_nos = array('i', hc.node_nos)
+        if sys.byteorder != 'little':
+            order.byteswap()
+            node_nos.byteswap()
+
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, hc.width, hc.height, hc.seed))
+            order.tofile(f)
+            node_nos.tofile(f)
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, width, height, seed) -> HamiltonianCycle | None:
+        path = self.path_for(width, height, seed)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(data) < HEADER.size:
+            raise ValueError(f"Truncated cycle cache file: {path}")
+        magic, version, file_width, file_height, file_seed = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION or (file_width, file_height, file_seed) != (width, height, seed):
+            raise ValueError(f"Invalid cycle cache file: {path}")
+
+        # Недописанный или обрезанный файл отсекаем здесь, а не ошибкой при обходе цикла
+        size = width * height
+        if len(data) != HEADER.size + 2 * size * CELL_SIZE:
+            raise ValueError(f"Cycle cache file has wrong size: {path}")
+        values = memoryview(data)[HEADER.size:].cast('i')
+        if sys.byteorder != 'little':
+            values = array('i', values)
+            values.byteswap()
+        order = values[:size]
+        node_nos = values[size:2 * size]
+        return HamiltonianCycle.from_order(width, height, order, node_nos=node_nos, seed=seed)
+
+    def get(self, width, height, seed) -> HamiltonianCycle:
+        hc = self.load(width, height, seed)
+        if hc is None:
+            hc = HamiltonianCycle(width, height, seed=seed)
+            self.save(hc)
+        return hc
+
+    def seeds(self, width, height) -> list[int]:
+        directory = self.size_directory(width, height)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(name[:-len(EXTENSION)]) for name in os.listdir(directory) if name.endswith(EXTENSION))
+
+    def get_for_game(self, width, height, game_seed) -> HamiltonianCycle:
+        # Тот же цикл, который HamiltonGame с этим сидом построила бы сама
+        return self.get(width, height, derive_seed(game_seed, 'cycle'))
+
+    def random_cycle(self, width, height, game_seed) -> HamiltonianCycle:
+        # Случайный цикл из заранее сгенерированного пула; новый строится, только если пул пуст
+        seeds = self.seeds(width, height)
+        if not seeds:
+            return self.get_for_game(width, height, game_seed)
+        rng = random.Random(derive_seed(game_seed, 'cycle'))
+        return self.get(width, height, rng.choice(seeds))
+
+    def pregenerate(self, width, height, count, first_game_seed=0) -> list[int]:
+        game_seeds = list(range(first_game_seed, first_game_seed + count))
+        for game_seed in game_seeds:
+            self.get_for_game(width, height, game_seed)
+        return game_seeds
+
+
+if __name__ == '__main__':
+    cache = CycleCache()
+    game_seeds = cache.pregenerate(int(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3]))
+    print(f"Cycles cached for game seeds {game_seeds[0]}..{game_seeds[-1]}")
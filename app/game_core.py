@@ -1,65 +1,180 @@
-from enum import Enum
-from random import random
+from array import array
+from collections import deque
+from enum import IntEnum
+import random
 
+from app.profiling import timed
+from app.seeds import new_seed
 
-class Direction(Enum):
-    UP = 1
-    DOWN = 2
-    LEFT = 3
-    RIGHT = 4
 
+class Direction(IntEnum):
+    UP = 0
+    DOWN = 1
+    LEFT = 2
+    RIGHT = 3
+
+
+# Таблицы по значению направления: смещение головы и противоположное направление
+DX = (0, 0, -1, 1)
+DY = (-1, 1, 0, 0)
+OPPOSITE = (Direction.DOWN, Direction.UP, Direction.RIGHT, Direction.LEFT)
 
 TCoord = tuple[int, int]
 
 
+class FreeCells:
+    __slots__ = ('width', 'height', 'cells', 'positions')
+
+    # Клетка (x, y) хранится числом x * height + y в массивах int32: так индекс на игру занимает
+    # 8 байт на клетку. Заполненные массивы для каждого размера поля копируются в новую игру
+    templates: dict[tuple[int, int], array] = {}
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        template = self.templates.get((width, height))
+        if template is None:
+            template = array('i', range(width * height))
+            self.templates[(width, height)] = template
+        self.cells = array('i', template)
+        # Позиция клетки в cells или -1, если клетка занята
+        self.positions = array('i', template)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell: TCoord):
+        index = self.index(cell)
+        return index >= 0 and self.positions[index] >= 0
+
+    def index(self, cell: TCoord) -> int:
+        x, y = cell
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x * self.height + y
+        return -1
+
+    def add(self, cell: TCoord):
+        index = self.index(cell)
+        if index < 0 or self.positions[index] >= 0:
+            return
+        self.positions[index] = len(self.cells)
+        self.cells.append(index)
+
+    def remove(self, cell: TCoord):
+        index = self.index(cell)
+        if index < 0:
+            return
+        i = self.positions[index]
+        if i < 0:
+            return
+        self.positions[index] = -1
+        # Удаляем за O(1): на место удалённой клетки ставим последнюю
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.positions[last] = i
+
+    def choice(self, rand: float) -> TCoord:
+        index = self.cells[int(rand * len(self.cells))]
+        return index // self.height, index % self.height
+
+
+class GameObserver:
+    def on_tick(self, game: "Game"):
+        pass
+
+    def on_game_over(self, game: "Game"):
+        pass
+
+
 class Snake:
+    __slots__ = ('direction', 'occupancy', 'free_cells', '_body')
+
     def __init__(self, start_coord: TCoord = (0, 0)):
         self.direction = Direction.RIGHT
+        # Сколько сегментов занимает клетка: после grow хвост на один ход удваивается
+        self.occupancy: dict[TCoord, int] = {}
+        self.free_cells: FreeCells | None = None
+        self._body: deque[TCoord] = deque()
         self.body = [start_coord]
 
-    def move(self):
-        head = self.body[0]
-        if self.direction == Direction.UP:
-            new_head = (head[0], head[1] - 1)
-        elif self.direction == Direction.DOWN:
-            new_head = (head[0], head[1] + 1)
-        elif self.direction == Direction.LEFT:
-            new_head = (head[0] - 1, head[1])
-        elif self.direction == Direction.RIGHT:
-            new_head = (head[0] + 1, head[1])
+    @property
+    def body(self) -> deque[TCoord]:
+        return self._body
+
+    @body.setter
+    def body(self, body):
+        for cell in self._body:
+            self.release(cell)
+        self._body = deque(body)
+        for cell in self._body:
+            self.occupy(cell)
+
+    def attach_free_cells(self, free_cells: FreeCells):
+        self.free_cells = free_cells
+        for cell in self.occupancy:
+            free_cells.remove(cell)
+
+    def occupy(self, cell: TCoord):
+        count = self.occupancy.get(cell, 0)
+        self.occupancy[cell] = count + 1
+        if not count and self.free_cells is not None:
+            self.free_cells.remove(cell)
+
+    def release(self, cell: TCoord):
+        count = self.occupancy[cell] - 1
+        if count:
+            self.occupancy[cell] = count
         else:
-            raise ValueError(f"Unknown direction: {self.direction}")
-        self.body = [new_head] + self.body[:-1]
+            del self.occupancy[cell]
+            if self.free_cells is not None:
+                self.free_cells.add(cell)
+
+    def occupies(self, cell: TCoord) -> bool:
+        return cell in self.occupancy
+
+    def collides_with_itself(self) -> bool:
+        return self.occupancy[self._body[0]] > 1
+
+    def move(self):
+        x, y = self._body[0]
+        direction = self.direction
+        new_head = (x + DX[direction], y + DY[direction])
+        self._body.appendleft(new_head)
+        self.occupy(new_head)
+        self.release(self._body.pop())
 
     def change_direction(self, direction: Direction):
-        if self.direction == Direction.UP and direction == Direction.DOWN:
-            return
-        if self.direction == Direction.DOWN and direction == Direction.UP:
-            return
-        if self.direction == Direction.LEFT and direction == Direction.RIGHT:
-            return
-        if self.direction == Direction.RIGHT and direction == Direction.LEFT:
-            return
-        self.direction = direction
+        # Разворот на месте запрещён
+        if direction != OPPOSITE[self.direction]:
+            self.direction = direction
 
     def on_food_eaten(self):
         pass
 
     def grow(self):
-        self.body.append(self.body[-1])
+        tail = self._body[-1]
+        self._body.append(tail)
+        self.occupy(tail)
 
     def kill(self):
         pass
 
 
 class Game:
-    def __init__(self, width=10, height=10):
+    def __init__(self, width=10, height=10, seed: int | None = None):
         self.width = width
         self.height = height
+        # Зерно хранится, чтобы партию можно было воспроизвести (см. app.replay)
+        self.seed = seed if seed is not None else new_seed()
+        self.rng = random.Random(self.seed)
         self.snake: Snake | None = None
         self.food: TCoord | None = None
+        self.free_cells = FreeCells(width, height)
         self.is_over = False
+        self.observers: list[GameObserver] = []
 
+    @timed('game.tick')
     def tick(self):
         if self.is_over:
             return False
@@ -70,36 +185,52 @@ class Game:
 
         # Проверяем, не столкнулась ли змейка со стеной или с собой
         if not self.check_collision():
-            self.is_over = True
             self.snake.kill()
+            self.notify('on_tick')
+            self.finish()
             return False
 
         # Проверяем, съела ли змейка еду
         if self.snake.body[0] == self.food:
             self.snake.on_food_eaten()
             if not self.spawn_food():
-                self.is_over = True
+                self.notify('on_tick')
+                self.finish()
                 return False
             self.snake.grow()
 
+        self.notify('on_tick')
         return True
 
+    def finish(self):
+        self.is_over = True
+        self.notify('on_game_over')
+
+    def add_observer(self, observer: GameObserver):
+        self.observers.append(observer)
+
+    def remove_observer(self, observer: GameObserver):
+        self.observers.remove(observer)
+
+    def notify(self, event: str):
+        for observer in self.observers:
+            handler = getattr(observer, event, None)
+            if handler is not None:
+                handler(self)
+
     def add_snake(self, snake: Snake):
         if self.snake is not None:
             raise ValueError("Snake already added")
 
         self.snake = snake
+        snake.attach_free_cells(self.free_cells)
 
+    @timed('game.spawn_food')
     def spawn_food(self) -> bool:
-        if len(self.snake.body) == self.width * self.height:
+        if not self.free_cells:
             return False
 
-        while True:
-            new_food = (int(random() * self.width), int(random() * self.height))
-            if new_food not in self.snake.body:
-                self.food = new_food
-                break
-
+        self.food = self.free_cells.choice(self.rng.random())
         return True
 
     def check_collision(self) -> bool:
@@ -108,6 +239,6 @@ class Game:
             return False
         if head[1] < 0 or head[1] >= self.height:
             return False
-        if head in self.snake.body[1:]:
+        if self.snake.collides_with_itself():
             return False
         return True
@@ -0,0 +1,222 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from app.batch_network import BatchNetwork
+from app.game_core import Game, Direction, Snake, TCoord
+from app import profiling
+from app.profiling import timed
+from app.seeds import new_seed, derive_seed
+
+MAX_TICKS_WITHOUT_FOOD = 300
+INPUTS_COUNT = 13
+BOARD_WIDTH = 64
+BOARD_HEIGHT = 36
+OUTPUT_DIRECTIONS = (Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT)
+
+generation = 0
+# Базовое зерно запуска: из него выводится зерно каждого поколения
+base_seed = new_seed()
+
+
+class GenerationGame(Game):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ticks = 0
+        self.last_growth_tick = 0
+
+    def tick(self):
+        is_success = super().tick()
+        if is_success:
+            self.ticks += 1
+            if self.ticks - self.last_growth_tick >= MAX_TICKS_WITHOUT_FOOD:
+                self.finish()
+                return False
+
+        return is_success
+
+    def spawn_food(self) -> bool:
+        if not super().spawn_food():
+            return False
+
+        self.last_growth_tick = self.ticks
+        return True
+
+    @timed('generation.get_data')
+    def get_data(self):
+        head = self.snake.body[0]
+
+        nearest_upper_wall, nearest_lower_wall, nearest_left_wall, nearest_right_wall = self.get_distances(head)
+
+        return [
+            self.snake.direction == Direction.UP,
+            self.snake.direction == Direction.DOWN,
+            self.snake.direction == Direction.LEFT,
+            self.snake.direction == Direction.RIGHT,
+            head[0] < self.food[0],
+            head[0] > self.food[0],
+            head[1] < self.food[1],
+            head[1] > self.food[1],
+            len(self.snake.body) - 1,
+            nearest_upper_wall,
+            nearest_lower_wall,
+            nearest_left_wall,
+            nearest_right_wall
+        ]
+
+    def get_distances(self, head: TCoord) -> tuple[int, int, int, int]:
+        # Расстояние до ближайшего сегмента по лучу от головы, иначе до стены
+        up, down, left, right = head[1], self.height - head[1], head[0], self.width - head[0]
+
+        # Короткую змейку быстрее перебрать целиком, чем идти лучами до стен
+        if len(self.snake.body) < self.width + self.height:
+            for x, y in self.snake.body:
+                if x == head[0]:
+                    if y < head[1]:
+                        up = min(up, head[1] - y)
+                    elif y > head[1]:
+                        down = min(down, y - head[1])
+                elif y == head[1]:
+                    if x < head[0]:
+                        left = min(left, head[0] - x)
+                    else:
+                        right = min(right, x - head[0])
+            return up, down, left, right
+
+        return (
+            self.cast_ray(head, 0, -1, up),
+            self.cast_ray(head, 0, 1, down),
+            self.cast_ray(head, -1, 0, left),
+            self.cast_ray(head, 1, 0, right),
+        )
+
+    def cast_ray(self, head: TCoord, dx: int, dy: int, wall_distance: int) -> int:
+        x, y = head
+        for distance in range(1, wall_distance):
+            x += dx
+            y += dy
+            if self.snake.occupies((x, y)):
+                return distance
+        return wall_distance
+
+    def get_reward(self):
+        return (len(self.snake.body) - 1) * 10
+
+
+def create_game(width=BOARD_WIDTH, height=BOARD_HEIGHT, snake: Snake | None = None, seed: int | None = None) -> GenerationGame:
+    game = GenerationGame(width, height, seed=seed)
+    game.add_snake(snake or Snake())
+    game.spawn_food()
+    return game
+
+
+def get_population_data(games: list[GenerationGame], out: np.ndarray) -> np.ndarray:
+    for i, game in enumerate(games):
+        if not game.is_over:
+            out[i] = game.get_data()
+    return out
+
+
+def get_alive_rows(games: list[GenerationGame]) -> np.ndarray:
+    return np.array([i for i, game in enumerate(games) if not game.is_over], dtype=np.int64)
+
+
+def apply_outputs(games: list[GenerationGame], outputs: np.ndarray, rows: np.ndarray):
+    for i, choice in zip(rows, outputs.argmax(axis=1)):
+        games[i].snake.change_direction(OUTPUT_DIRECTIONS[choice])
+
+
+def generation_seed(base_seed: int, number: int) -> int:
+    return derive_seed(base_seed, 'generation', number)
+
+
+def evaluate_genomes(genomes, config, width=BOARD_WIDTH, height=BOARD_HEIGHT, seed: int | None = None) -> list[float]:
+    # Все геномы поколения играют с одним зерном: одинаковые условия и результат,
+    # не зависящий от того, как популяция разбита по процессам
+    if seed is None:
+        seed = new_seed()
+    network = BatchNetwork(genomes, config)
+    games = [create_game(width, height, seed=seed) for _ in genomes]
+    fitnesses = [0] * len(games)
+    data = np.zeros((len(games), INPUTS_COUNT))
+
+    rows = get_alive_rows(games)
+    while len(rows):
+        get_population_data(games, data)
+        apply_outputs(games, network.activate(data[rows], rows), rows)
+        for i in rows:
+            games[i].tick()
+            fitnesses[i] += games[i].get_reward()
+        rows = get_alive_rows(games)
+    return fitnesses
+
+
+def evaluate_chunk(genomes, config, width, height, seed) -> tuple[list[float], dict | None]:
+    fitnesses = evaluate_genomes(genomes, config, width, height, seed)
+    # Замеры воркера уходят в родительский процесс вместе с результатом куска
+    return fitnesses, profiling.take() if profiling.enabled else None
+
+
+def report_generation(fitnesses: list[float]):
+    global generation
+    generation += 1
+    print(f"Generation {generation} finished with best fitness: {max(fitnesses, default=0)}")
+
+
+def run_generation(genomes, config, width=BOARD_WIDTH, height=BOARD_HEIGHT):
+    fitnesses = evaluate_genomes([genome for _, genome in genomes], config, width, height, generation_seed(base_seed, generation))
+    for (_, genome), fitness in zip(genomes, fitnesses):
+        genome.fitness = fitness
+    report_generation(fitnesses)
+
+
+class ParallelEvaluator:
+    def __init__(self, num_workers: int | None = None, width=BOARD_WIDTH, height=BOARD_HEIGHT, seed: int | None = None):
+        self.num_workers = num_workers or os.cpu_count()
+        self.width = width
+        self.height = height
+        self.seed = seed if seed is not None else new_seed()
+        self.pool = multiprocessing.Pool(self.num_workers, initializer=profiling.init_worker, initargs=(profiling.enabled,))
+
+    def __call__(self, genomes, config):
+        self.run_generation(genomes, config)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def run_generation(self, genomes, config):
+        chunks = self.split([genome for _, genome in genomes])
+        # Зерно считается в родительском процессе: счётчик поколений в воркерах не ведётся
+        chunk_seed = generation_seed(self.seed, generation)
+        results = self.pool.starmap(evaluate_chunk, [(chunk, config, self.width, self.height, chunk_seed) for chunk in chunks])
+
+        fitnesses = []
+        for chunk_fitnesses, profile in results:
+            fitnesses.extend(chunk_fitnesses)
+            if profile is not None:
+                profiling.merge(profile)
+        # Сами тики идут в воркерах, поэтому сводку по времени проверяем здесь
+        profiling.maybe_report()
+        for (_, genome), fitness in zip(genomes, fitnesses):
+            genome.fitness = fitness
+        report_generation(fitnesses)
+
+    def split(self, genomes: list) -> list[list]:
+        chunk_count = min(self.num_workers, len(genomes))
+        # Первые len % chunk_count кусков получают на один геном больше
+        size, rest = divmod(len(genomes), chunk_count) if chunk_count else (0, 0)
+        chunks = []
+        start = 0
+        for i in range(chunk_count):
+            end = start + size + (1 if i < rest else 0)
+            chunks.append(genomes[start:end])
+            start = end
+        return chunks
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
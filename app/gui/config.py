@@ -2,3 +2,9 @@ DIVIDER = 30
 FPS = 120
 TICKS_PER_SECOND = 10
 NANOS_PER_TICK = 1_000_000_000 // TICKS_PER_SECOND
+# Сколько пропущенных тиков догоняется за кадр; большее отставание (долгий поиск, перетаскивание окна) сбрасывается
+MAX_CATCH_UP_TICKS = 5
+# Сколько времени кадра в режиме ускорения отдаётся на тики (None - играть до конца без отрисовки)
+FAST_FORWARD_BUDGET_NS = 1_000_000_000 // FPS
+# Перерисовывать только изменившиеся области экрана
+DIRTY_RECTS = True
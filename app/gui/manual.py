@@ -1,44 +1,48 @@
-import os
 import time
 
 import pygame
 
-from app.game_core import Game, Direction
+from app.game_core import Game, Direction, Snake
 from app.gui.config import DIVIDER, NANOS_PER_TICK, FPS
-from app.gui.objects import GUISnake, SAppleSprite
-from app.sprites import ASSETS_DIR, SnakeSegmentSprite, AppleSprite
+from app.gui.objects import SAppleSprite, SnakeRenderer
+from app.gui.render import Renderer
+from app.sprites import load_texture, SnakeSegmentSprite, AppleSprite
 
 
-def main():
+def main(game_width: int | None = None, game_height: int | None = None, seed: int | None = None):
     # Initialize Pygame
     pygame.init()
 
     # Set up the screen
-    screen = pygame.display.set_mode([0, 0], pygame.FULLSCREEN)
+    if game_width and game_height:
+        screen = pygame.display.set_mode([game_width * DIVIDER, game_height * DIVIDER])
+    else:
+        screen = pygame.display.set_mode([0, 0], pygame.FULLSCREEN)
 
     # Get screen dimensions
     width = screen.get_width()
     height = screen.get_height()
 
     # Set up the background
-    background = pygame.image.load(os.path.join(ASSETS_DIR, 'background.jpg'))
-    background = pygame.transform.scale(background, (width, height))
+    background = load_texture('background.jpg', width, height, alpha=False)
 
     # Set up the clock
     clock = pygame.time.Clock()
 
     # Initialize Groups
-    all_sprites = pygame.sprite.Group()
+    renderer = Renderer(screen, background)
+    all_sprites = renderer.sprites
     SnakeSegmentSprite.containers = all_sprites
     AppleSprite.containers = all_sprites
 
     # Set up the game
-    game = Game(width // DIVIDER, height // DIVIDER)
-    snake = GUISnake()
+    game = Game(width // DIVIDER, height // DIVIDER, seed=seed)
+    snake = Snake()
     game.add_snake(snake)
     game.spawn_food()
 
     # Initialize the sprite
+    renderer.add_view(SnakeRenderer(game))
     SAppleSprite(game, width=DIVIDER, height=DIVIDER)
 
     # Main loop
@@ -57,16 +61,11 @@ def main():
                 if event.key == pygame.K_RIGHT:
                     snake.change_direction(Direction.RIGHT)
 
-        screen.blit(background, (0, 0))
-
         current_tick = time.time_ns()
         if current_tick - last_tick >= NANOS_PER_TICK:
             last_tick += NANOS_PER_TICK
             if not game.tick():
                 return
 
-        all_sprites.update()
-        all_sprites.draw(screen)
-
-        pygame.display.flip()
+        renderer.render()
         clock.tick(FPS)
@@ -1,84 +1,19 @@
-import os
 import sys
 
-import neat
+import numpy as np
 import pygame
 
 import app.gui
-from app.game_core import Game, Direction
+from app.batch_network import BatchNetwork
+import app.generation
+from app.generation import INPUTS_COUNT, create_game, get_alive_rows, get_population_data, apply_outputs, generation_seed
 from app.gui.config import DIVIDER, FPS
-from app.gui.objects import GUISnake, SAppleSprite
-from app.sprites import ASSETS_DIR, SnakeSegmentSprite, AppleSprite
+from app.gui.objects import SAppleSprite, SnakeRenderer
+from app.gui.render import Renderer
+from app.sprites import load_texture, SnakeSegmentSprite, AppleSprite
 
 start = False
 generation = 0
-MAX_TICKS_WITHOUT_FOOD = 300
-
-
-class GenerationGame(Game):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.ticks = 0
-        self.last_growth_tick = 0
-
-    def tick(self):
-        is_success = super().tick()
-        if is_success:
-            self.ticks += 1
-            if self.ticks - self.last_growth_tick >= MAX_TICKS_WITHOUT_FOOD:
-                self.is_over = True
-                return False
-
-        return is_success
-
-    def spawn_food(self) -> bool:
-        if not super().spawn_food():
-            return False
-
-        self.last_growth_tick = self.ticks
-        return True
-
-    def get_data(self):
-        head = self.snake.body[0]
-
-        nearest_upper_wall = head[1]
-        higher_body = [segment for segment in self.snake.body if segment[1] < head[1] and segment != head]
-        if higher_body:
-            nearest_upper_wall = head[1] - max(higher_body)[1]
-
-        nearest_lower_wall = self.height - head[1]
-        lower_body = [segment for segment in self.snake.body if segment[1] > head[1] and segment != head]
-        if lower_body:
-            nearest_lower_wall = min(lower_body)[1] - head[1]
-
-        nearest_left_wall = head[0]
-        left_body = [segment for segment in self.snake.body if segment[0] < head[0] and segment != head]
-        if left_body:
-            nearest_left_wall = head[0] - max(left_body)[0]
-
-        nearest_right_wall = self.width - head[0]
-        right_body = [segment for segment in self.snake.body if segment[0] > head[0] and segment != head]
-        if right_body:
-            nearest_right_wall = min(right_body)[0] - head[0]
-
-        return [
-            self.snake.direction == Direction.UP,
-            self.snake.direction == Direction.DOWN,
-            self.snake.direction == Direction.LEFT,
-            self.snake.direction == Direction.RIGHT,
-            self.snake.body[0][0] < self.food[0],
-            self.snake.body[0][0] > self.food[0],
-            self.snake.body[0][1] < self.food[1],
-            self.snake.body[0][1] > self.food[1],
-            len(self.snake.body) - 1,
-            nearest_upper_wall,
-            nearest_lower_wall,
-            nearest_left_wall,
-            nearest_right_wall
-        ]
-
-    def get_reward(self):
-        return (len(self.snake.body) - 1) * 10
 
 
 def run_generation(genomes, config):
@@ -93,34 +28,32 @@ def run_generation(genomes, config):
     height = screen.get_height()
 
     # Set up the background
-    background = pygame.image.load(os.path.join(ASSETS_DIR, 'background.jpg'))
-    background = pygame.transform.scale(background, (width, height))
+    background = load_texture('background.jpg', width, height, alpha=False)
 
     # Set up the clock
     clock = pygame.time.Clock()
 
     # Initialize Groups
-    all_sprites = pygame.sprite.Group()
+    renderer = Renderer(screen, background)
+    all_sprites = renderer.sprites
     SnakeSegmentSprite.containers = all_sprites
     AppleSprite.containers = all_sprites
 
-    nets = []
+    network = BatchNetwork([g for _, g in genomes], config)
+    data = np.zeros((len(genomes), INPUTS_COUNT))
     games = []
+    seed = generation_seed(app.generation.base_seed, app.gui.neat.generation)
 
     # init genomes
     for i, g in genomes:
-        net = neat.nn.FeedForwardNetwork.create(g, config)
-        nets.append(net)
         g.fitness = 0  # every genome is not successful at the start
 
         # init games
-        game = GenerationGame(width // DIVIDER, height // DIVIDER)
-        snake = GUISnake()
-        game.add_snake(snake)
-        game.spawn_food()
+        game = create_game(width // DIVIDER, height // DIVIDER, seed=seed)
         games.append(game)
 
         # Initialize the sprite
+        renderer.add_view(SnakeRenderer(game))
         SAppleSprite(game, width=DIVIDER, height=DIVIDER)
 
     font = pygame.font.SysFont("Roboto", 40)
@@ -141,21 +74,9 @@ def run_generation(genomes, config):
             continue
 
         # input each game data
-        for i, game in enumerate(games):
-            if game.is_over:
-                continue
-
-            output = nets[i].activate(game.get_data())
-            i = output.index(max(output))
-
-            if i == 0:
-                game.snake.change_direction(Direction.UP)
-            elif i == 1:
-                game.snake.change_direction(Direction.DOWN)
-            elif i == 2:
-                game.snake.change_direction(Direction.LEFT)
-            elif i == 3:
-                game.snake.change_direction(Direction.RIGHT)
+        rows = get_alive_rows(games)
+        get_population_data(games, data)
+        apply_outputs(games, network.activate(data[rows], rows), rows)
 
         # now, update game and set fitness (for alive games only)
         games_left = 0
@@ -173,22 +94,16 @@ def run_generation(genomes, config):
             break
 
         # display stuff
-        screen.blit(background, (0, 0))
-
-        all_sprites.update()
-        all_sprites.draw(screen)
-
         label = heading_font.render("Поколение: " + str(app.gui.neat.generation), True, (73, 168, 70))
         label_rect = label.get_rect()
         label_rect.center = (width / 2, height / 2 - 100)
-        screen.blit(label, label_rect)
+        heading_label = (label, label_rect)
 
         label = font.render("Игр осталось: " + str(games_left), True, (51, 59, 70))
         label_rect = label.get_rect()
         label_rect.center = (width / 2, height / 2)
-        screen.blit(label, label_rect)
 
-        pygame.display.flip()
+        renderer.render([heading_label, (label, label_rect)])
         clock.tick(FPS)
 
     pygame.quit()
@@ -1,6 +1,6 @@
 from functools import partial
 
-from app.game_core import Snake
+from app.game_core import Game, GameObserver
 from app.gui.config import DIVIDER
 from app.sprites import SnakeSegmentSprite, AppleSprite, SnakeFuturePathSegmentSprite
 
@@ -9,27 +9,37 @@ SSnakeFuturePathSegmentSprite = partial(SnakeFuturePathSegmentSprite, width=DIVI
 SAppleSprite = partial(AppleSprite, width=DIVIDER, height=DIVIDER)
 
 
-class GUISnake(Snake):
-    def __init__(self):
-        super().__init__()
-        self.segments = [SSnakeSegmentSprite(position, is_head=(i == 0)) for i, position in enumerate(self.body)]
+class SnakeRenderer(GameObserver):
+    def __init__(self, game: Game):
+        self.game = game
+        self.segments = []
+        self.is_outdated = False
+        self.reset_segments(game)
+        game.add_observer(self)
+
+    def reset_segments(self, game: Game):
+        self.kill_segments()
+        self.segments = [SSnakeSegmentSprite(position, is_head=(i == 0)) for i, position in enumerate(game.snake.body)]
 
-    def reset_segments(self):
+    def kill_segments(self):
         for segment in self.segments:
             segment.kill()
-        self.segments = [SSnakeSegmentSprite(position, is_head=(i == 0)) for i, position in enumerate(self.body)]
+        self.segments = []
 
-    def move(self):
-        super().move()
-        for segment, position in zip(self.segments, self.body):
-            segment.update_position(position)
+    def on_tick(self, game: Game):
+        # Спрайты двигаются один раз за кадр, сколько бы тиков ни прошло
+        self.is_outdated = True
 
-    def grow(self):
-        super().grow()
-        self.segments.append(SSnakeSegmentSprite(self.body[-1]))
+    def sync(self):
+        if not self.is_outdated or self.game.is_over:
+            return
+        self.is_outdated = False
 
-    def kill(self):
-        super().kill()
-        for segment in self.segments:
-            segment.kill()
-        self.segments = []
+        body = self.game.snake.body
+        while len(self.segments) < len(body):
+            self.segments.append(SSnakeSegmentSprite(body[len(self.segments)]))
+        for segment, position in zip(self.segments, body):
+            segment.update_position(position)
+
+    def on_game_over(self, game: Game):
+        self.kill_segments()
@@ -0,0 +1,57 @@
+import pygame
+
+from app.gui.config import DIRTY_RECTS
+from app.profiling import timed
+
+
+class Renderer:
+    def __init__(self, screen: pygame.Surface, background: pygame.Surface, dirty_rects=DIRTY_RECTS):
+        self.screen = screen
+        self.background = background
+        self.dirty_rects = dirty_rects
+        self.sprites = pygame.sprite.LayeredDirty()
+        self.sprites.clear(screen, background)
+        self.overlay_rects: list[pygame.Rect] = []
+        # Объекты с методом sync(), которые переносят состояние игры в спрайты перед отрисовкой
+        self.views = []
+
+        self.screen.blit(self.background, (0, 0))
+        pygame.display.flip()
+
+    def add_view(self, view):
+        self.views.append(view)
+        return view
+
+    @timed('render')
+    def render(self, overlays: list[tuple[pygame.Surface, pygame.Rect]] = ()):
+        for view in self.views:
+            view.sync()
+        self.sprites.update()
+
+        if not self.dirty_rects:
+            self.screen.blit(self.background, (0, 0))
+            for sprite in self.sprites:
+                sprite.dirty = 1
+            self.sprites.draw(self.screen)
+            for surface, rect in overlays:
+                self.screen.blit(surface, rect)
+            self.present()
+            return
+
+        # Надписи прошлого кадра стираем фоном, спрайты под ними перерисуются
+        for rect in self.overlay_rects:
+            self.sprites.repaint_rect(rect)
+        rects = self.sprites.draw(self.screen)
+
+        overlay_rects = []
+        for surface, rect in overlays:
+            overlay_rects.append(self.screen.blit(surface, rect))
+        self.present(rects + self.overlay_rects + overlay_rects)
+        self.overlay_rects = overlay_rects
+
+    @timed('render.flip')
+    def present(self, rects: list[pygame.Rect] | None = None):
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
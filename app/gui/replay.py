@@ -0,0 +1,81 @@
+import time
+
+import pygame
+
+from app.gui.config import DIVIDER, FPS, TICKS_PER_SECOND, FAST_FORWARD_BUDGET_NS
+from app.gui.objects import SAppleSprite, SnakeRenderer
+from app.gui.render import Renderer
+from app.replay import Replay, play
+from app.sprites import load_texture, SnakeSegmentSprite, AppleSprite
+
+MIN_TICKS_PER_SECOND = 1
+MAX_TICKS_PER_SECOND = 100_000
+
+
+def main(path: str, ticks_per_second=TICKS_PER_SECOND):
+    replay = Replay(path)
+    print(f"Replay: {replay.width}x{replay.height}, seed {replay.seed}, {replay.ticks} ticks")
+
+    # Initialize Pygame
+    pygame.init()
+
+    # Set up the screen
+    screen = pygame.display.set_mode([replay.width * DIVIDER, replay.height * DIVIDER])
+    width = screen.get_width()
+    height = screen.get_height()
+
+    # Set up the background
+    background = load_texture('background.jpg', width, height, alpha=False)
+
+    # Set up the clock
+    clock = pygame.time.Clock()
+
+    # Initialize Groups
+    renderer = Renderer(screen, background)
+    SnakeSegmentSprite.containers = renderer.sprites
+    AppleSprite.containers = renderer.sprites
+
+    # Set up the game
+    game = replay.create_game()
+    ticks = play(replay, game)
+
+    # Initialize the sprite
+    renderer.add_view(SnakeRenderer(game))
+    SAppleSprite(game, width=DIVIDER, height=DIVIDER)
+
+    # Main loop
+    # UP/DOWN меняют скорость вдвое, SPACE ставит на паузу
+    last_tick = time.time_ns()
+    is_paused = False
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    is_paused = not is_paused
+                if event.key == pygame.K_UP:
+                    ticks_per_second = min(ticks_per_second * 2, MAX_TICKS_PER_SECOND)
+                    print(f"Speed: {ticks_per_second} ticks/s")
+                if event.key == pygame.K_DOWN:
+                    ticks_per_second = max(ticks_per_second // 2, MIN_TICKS_PER_SECOND)
+                    print(f"Speed: {ticks_per_second} ticks/s")
+                last_tick = time.time_ns()
+
+        nanos_per_tick = 1_000_000_000 // ticks_per_second
+        if is_paused:
+            last_tick = time.time_ns()
+        else:
+            # Если не успеваем за скоростью, пропускаем отставание вместо бесконечного догоняния
+            deadline = None if FAST_FORWARD_BUDGET_NS is None else time.time_ns() + FAST_FORWARD_BUDGET_NS
+            while time.time_ns() - last_tick >= nanos_per_tick:
+                last_tick += nanos_per_tick
+                if next(ticks, None) is None:
+                    print(f"Replay finished, length: {len(game.snake.body)}")
+                    return
+                if deadline is not None and time.time_ns() >= deadline:
+                    last_tick = time.time_ns()
+                    break
+
+        renderer.render()
+        clock.tick(FPS)
@@ -0,0 +1,191 @@
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import time
+
+from app import profiling
+from app.hamilton_game import HamiltonGame, HamiltonSnake
+from app.planners import PLANNERS, Planner
+from app.replay import EXTENSION, ReplayWriter
+
+SIZES = [10, 20, 30]
+GAMES_PER_SIZE = 100
+# Столько ходов без еды считается зависанием: по циклу змейка дошла бы до любого яблока быстрее
+STALL_FACTOR = 2
+# Партии должны воспроизводиться по сиду, поэтому планировщики, зависящие от скорости машины, не подходят
+BATCH_PLANNERS = [name for name, planner in PLANNERS.items() if planner.is_deterministic]
+
+
+class MeasuredPlanner(Planner):
+    """Обёртка, которая копит время планировщика до каждого съеденного яблока."""
+
+    def __init__(self, planner: Planner):
+        self.planner = planner
+        self.elapsed = 0.0
+        self.apple_times: list[float] = []
+        self.has_apple = False
+
+    @property
+    def path(self):
+        return self.planner.path
+
+    def on_food_spawned(self, game: HamiltonGame):
+        # Новая еда - предыдущее яблоко съедено, его время закрываем
+        if self.has_apple:
+            self.finish_apple()
+        self.has_apple = True
+        start = time.perf_counter()
+        self.planner.on_food_spawned(game)
+        self.elapsed += time.perf_counter() - start
+
+    def next_direction(self, game: HamiltonGame):
+        start = time.perf_counter()
+        direction = self.planner.next_direction(game)
+        self.elapsed += time.perf_counter() - start
+        return direction
+
+    def finish_apple(self):
+        self.apple_times.append(self.elapsed)
+        self.elapsed = 0.0
+
+    def close(self):
+        self.planner.close()
+
+
+def play_game(width, height, seed, planner_name, stall_limit=None, replay_dir=None) -> dict:
+    stall_limit = stall_limit or STALL_FACTOR * width * height
+    planner = MeasuredPlanner(PLANNERS[planner_name]())
+    game = HamiltonGame(width, height, seed=seed, planner=planner)
+    game.add_snake(HamiltonSnake())
+
+    replay_path = None
+    writer = None
+    if replay_dir is not None:
+        replay_path = os.path.join(replay_dir, f'{width}x{height}-{seed}{EXTENSION}')
+        writer = ReplayWriter(replay_path, game)
+
+    moves = 0
+    last_apple_move = 0
+    length = len(game.snake.body)
+    is_stalled = False
+    while True:
+        is_running = game.tick()
+        moves += 1
+        if not is_running:
+            break
+        if len(game.snake.body) != length:
+            length = len(game.snake.body)
+            last_apple_move = moves
+        elif moves - last_apple_move >= stall_limit:
+            is_stalled = True
+            game.finish()
+            break
+
+    is_filled = len(game.snake.body) == width * height
+    if is_filled:
+        # После последнего яблока еда не появляется, его время закрываем здесь
+        planner.finish_apple()
+    if writer is not None:
+        writer.close()
+        # Храним только партии, которые стоит посмотреть
+        if is_filled:
+            os.remove(replay_path)
+            replay_path = None
+
+    result = {
+        'width': width,
+        'height': height,
+        'seed': seed,
+        'moves': moves,
+        'length': len(game.snake.body),
+        'is_filled': is_filled,
+        'is_stalled': is_stalled,
+        'apple_times': planner.apple_times,
+        'replay': replay_path,
+    }
+    if profiling.enabled:
+        # Замеры воркера уходят в родительский процесс вместе с результатом партии
+        result['profile'] = profiling.take()
+    return result
+
+
+def distribution(values: list[float]) -> dict | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        'mean': statistics.fmean(values),
+        'min': values[0],
+        'p50': values[len(values) // 2],
+        'p90': values[len(values) * 90 // 100],
+        'p99': values[len(values) * 99 // 100],
+        'max': values[-1],
+    }
+
+
+def summarize(width, height, results: list[dict]) -> dict:
+    filled = [r for r in results if r['is_filled']]
+    return {
+        'width': width,
+        'height': height,
+        'games': len(results),
+        'filled': len(filled),
+        'stalled': sum(r['is_stalled'] for r in results),
+        'failed': sum(not r['is_filled'] and not r['is_stalled'] for r in results),
+        'moves_to_fill': distribution([r['moves'] for r in filled]),
+        'planner_s_per_apple': distribution([t for r in results for t in r['apple_times']]),
+        'replays': [r['replay'] for r in results if r['replay']],
+    }
+
+
+def run_batch(sizes=SIZES, games=GAMES_PER_SIZE, planner='a_star', workers=None, first_seed=0,
+              stall_limit=None, replay_dir=None) -> list[dict]:
+    if planner not in BATCH_PLANNERS:
+        raise ValueError(f"Planner is not available for batch runs: {planner}")
+    if replay_dir is not None:
+        os.makedirs(replay_dir, exist_ok=True)
+
+    tasks = [
+        (size, size, seed, planner, stall_limit, replay_dir)
+        for size in sizes
+        for seed in range(first_seed, first_seed + games)
+    ]
+    workers = workers or os.cpu_count()
+    results: dict[int, list[dict]] = {size: [] for size in sizes}
+    with multiprocessing.Pool(workers, initializer=profiling.init_worker, initargs=(profiling.enabled,)) as pool:
+        for result in pool.starmap(play_game, tasks, chunksize=max(1, len(tasks) // (4 * workers))):
+            profile = result.pop('profile', None)
+            if profile is not None:
+                profiling.merge(profile)
+            results[result['width']].append(result)
+
+    summaries = []
+    for size in sizes:
+        summary = summarize(size, size, results[size])
+        print(json.dumps(summary))
+        summaries.append(summary)
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many Hamiltonian games without a window")
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--games', type=int, default=GAMES_PER_SIZE)
+    parser.add_argument('--planner', choices=BATCH_PLANNERS, default='a_star')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--stall-limit', type=int, default=None)
+    parser.add_argument('--replays', default=None, help="directory for replays of failed and stalled games")
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    summaries = run_batch(args.sizes, args.games, args.planner, args.workers, args.seed, args.stall_limit, args.replays)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'planner': args.planner, 'games': args.games, 'results': summaries}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
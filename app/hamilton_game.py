@@ -0,0 +1,86 @@
+from app.game_core import Game, Direction, Snake
+from app.hamiltonian_cycle import HamiltonianCycle, HPath
+from app.planners import Planner, AStarShortcutPlanner, next_cycle_node_no
+from app.seeds import derive_seed
+
+
+class HamiltonSnake(Snake):
+    __slots__ = ('hc', 'cycle', 'add_count')
+
+    def __init__(self):
+        super().__init__()
+        self.hc = None
+        self.cycle = []
+        self.add_count = 0
+
+    def grow(self):
+        super().grow()
+
+    def on_food_eaten(self):
+        super().on_food_eaten()
+        self.add_count += 1
+
+    def move(self):
+        super().move()
+        self.add_count = max(0, self.add_count - 1)
+
+    def reset_on_hamiltonian(self, hc, cycle):
+        self.hc = hc
+        self.cycle = cycle
+        self.body = [(self.cycle[3].x, self.cycle[3].y), (self.cycle[2].x, self.cycle[2].y), (self.cycle[1].x, self.cycle[1].y), (self.cycle[0].x, self.cycle[0].y)]
+        # Иначе при цикле, идущем влево, поворот из начального RIGHT считается разворотом
+        if self.cycle[3].x < self.cycle[2].x:
+            self.direction = Direction.LEFT
+        elif self.cycle[3].y < self.cycle[2].y:
+            self.direction = Direction.UP
+        elif self.cycle[3].y > self.cycle[2].y:
+            self.direction = Direction.DOWN
+        else:
+            self.direction = Direction.RIGHT
+
+
+class HamiltonGame(Game):
+    snake: HamiltonSnake
+
+    def __init__(self, *args, hc: HamiltonianCycle | None = None, planner: Planner | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Цикл строится из своего зерна, чтобы не сдвигать ГСЧ игры (и еду в записях)
+        self.hc = hc or HamiltonianCycle(self.width, self.height, seed=derive_seed(self.seed, 'cycle'))
+        self.cycle = self.hc.cycle
+        self.planner = planner or AStarShortcutPlanner()
+
+    @property
+    def path(self) -> HPath | None:
+        # Путь, который планировщик собирается пройти (для отрисовки)
+        return self.planner.path
+
+    def tick(self):
+        if self.is_over:
+            return False
+
+        self.snake.change_direction(self.planner.next_direction(self))
+        return super().tick()
+
+    def finish(self):
+        super().finish()
+        self.planner.close()
+
+    def add_snake(self, snake: HamiltonSnake):
+        super().add_snake(snake)
+        snake.reset_on_hamiltonian(self.hc, self.cycle)
+        self.spawn_food()
+
+    def spawn_food(self) -> bool:
+        is_spawn = super().spawn_food()
+        if is_spawn:
+            self.planner.on_food_spawned(self)
+        return is_spawn
+
+    def get_next_position(self):
+        return self.cycle[self.get_next_node_no()]
+
+    def get_next_node_no(self) -> int:
+        head_no = self.hc.get_node_no(self.snake.body[0][0], self.snake.body[0][1])
+        tail_no = self.hc.get_node_no(self.snake.body[-1][0], self.snake.body[-1][1])
+        apple_no = self.hc.get_node_no(self.food[0], self.food[1])
+        return next_cycle_node_no(self.hc, head_no, tail_no, apple_no, self.snake.add_count)
@@ -1,38 +1,34 @@
 import math
 import random
-from dataclasses import dataclass
 
-
-@dataclass
-class Vector:
-    x: int
-    y: int
+from app.seeds import new_seed
 
 
 class HamiltonianCycle:
-    def __init__(self, width, height):
+    def __init__(self, width, height, seed=None):
         self.width = width
         self.height = height
+        self.seed = seed if seed is not None else new_seed()
+        self.rng = random.Random(self.seed)
 
-        self.spanning_tree: list[HEdge] = []
-        self.spanning_tree_nodes: list[HNode] = []
         self.cycle: list[HNode] = []
+        # Номер клетки (x, y) в цикле хранится под индексом x * height + y
+        self.node_nos: list[int] = []
+        self.neighbour_node_nos: list[list[int] | None] = []
 
         self.create_cycle()
-
-        print("Hamiltonian Cycle created", len(self.cycle))
+        self.create_lookup_tables()
 
     def create_cycle(self):
-        self.create_spanning_tree()
+        # Остовное дерево нужно только здесь, после построения цикла его узлы не хранятся
+        spanning_tree_nodes = self.create_spanning_tree()
 
         cycle_nodes: list[HNode] = []
         for i in range(0, self.width):
             for j in range(0, self.height):
                 cycle_nodes.append(HNode(i, j))
-        for n in cycle_nodes:
-            n.set_edges(cycle_nodes)
-        for i in range(0, len(self.spanning_tree_nodes)):
-            current_spanning_tree_node = self.spanning_tree_nodes[i]
+        for i in range(0, len(spanning_tree_nodes)):
+            current_spanning_tree_node = spanning_tree_nodes[i]
             for other in current_spanning_tree_node.spanning_tree_adjacent_nodes:
                 def connect_nodes(x1, y1, x2, y2):
                     if y1 + self.height * x1 >= len(cycle_nodes) or y2 + self.height * x2 >= len(cycle_nodes):
@@ -52,44 +48,39 @@ class HamiltonianCycle:
                     connect_nodes(x, y + 1, x, y + 2)
                     connect_nodes(x + 1, y + 1, x + 1, y + 2)
 
+        # Рёбра храним по паре индексов узлов, чтобы проверять уникальность за O(1)
         degree_1_nodes = [n for n in cycle_nodes if len(n.spanning_tree_adjacent_nodes) == 1]
-        new_edges: list[HEdge] = []
+        new_edges: dict[tuple[int, int], HEdge] = {}
         for n in degree_1_nodes:
             d = n.spanning_tree_adjacent_nodes[0].get_direction_to(n)
             d['x'] += n.x
             d['y'] += n.y
-            new_edge = HEdge(cycle_nodes[d['y'] + self.height * d['x']], n)
-            unique_edge = True
-            for e in new_edges:
-                if e.is_equal_to(new_edge):
-                    unique_edge = False
-                    break
-            if unique_edge:
-                new_edges.append(new_edge)
+            m = cycle_nodes[d['y'] + self.height * d['x']]
+            new_edges.setdefault(self.edge_key(n, m), HEdge(m, n))
 
-        for e in new_edges:
+        for e in new_edges.values():
             e.connect_nodes()
 
-        degree_1_nodes = [n for n in cycle_nodes if len(n.spanning_tree_adjacent_nodes) == 1]
-        new_edges: list[HEdge] = []
-        for n in degree_1_nodes:
-            for m in degree_1_nodes:
-                if dist(n.x, n.y, m.x, m.y) == 1:
-                    if n.x // 2 == m.x // 2 and n.y // 2 == m.y // 2:
-                        new_edge = HEdge(m, n)
-                        unique_edge = True
-                        for e in new_edges:
-                            if e.is_equal_to(new_edge):
-                                unique_edge = False
-                                break
-                        if unique_edge:
-                            new_edges.append(new_edge)
-                        break
-
-        for e in new_edges:
+        is_degree_1 = [len(n.spanning_tree_adjacent_nodes) == 1 for n in cycle_nodes]
+        new_edges = {}
+        for n in cycle_nodes:
+            if not is_degree_1[n.x * self.height + n.y]:
+                continue
+            # Соседи в порядке возрастания индекса, как при переборе всего списка узлов
+            for x, y in ((n.x - 1, n.y), (n.x, n.y - 1), (n.x, n.y + 1), (n.x + 1, n.y)):
+                if not (0 <= x < self.width and 0 <= y < self.height):
+                    continue
+                if n.x // 2 != x // 2 or n.y // 2 != y // 2:
+                    continue
+                m = cycle_nodes[x * self.height + y]
+                if is_degree_1[x * self.height + y]:
+                    new_edges.setdefault(self.edge_key(n, m), HEdge(m, n))
+                    break
+
+        for e in new_edges.values():
             e.connect_nodes()
 
-        cycle: list[HNode] = [random.choice(cycle_nodes)]
+        cycle: list[HNode] = [self.rng.choice(cycle_nodes)]
 
         previous = cycle[0]
         node = cycle[0].spanning_tree_adjacent_nodes[0]
@@ -104,97 +95,135 @@ class HamiltonianCycle:
 
         self.cycle = cycle
         for i in range(0, len(self.cycle)):
-            self.cycle[i].cycle_no = i
-
-    def create_spanning_tree(self):
+            node = self.cycle[i]
+            node.cycle_no = i
+            # Списки смежности нужны только для построения цикла, дальше соседей дают таблицы номеров
+            node.spanning_tree_adjacent_nodes = ()
+            node.edges = ()
+
+    def edge_key(self, n: "HNode", m: "HNode") -> tuple[int, int]:
+        a = n.x * self.height + n.y
+        b = m.x * self.height + m.y
+        return (a, b) if a < b else (b, a)
+
+    def create_spanning_tree(self) -> list["HNode"]:
+        tree_height = self.height // 2
         st_nodes: list[HNode] = []
         for i in range(0, self.width // 2):
-            for j in range(0, self.height // 2):
+            for j in range(0, tree_height):
                 st_nodes.append(HNode(i, j))
+        link_grid_nodes(st_nodes, self.width // 2, tree_height)
+
+        # Рандомизированный алгоритм Прима: случайное ребро из границы дерева за O(1)
+        in_spanning_tree = [False] * len(st_nodes)
+        random_node = st_nodes[self.rng.randint(0, len(st_nodes) - 1)]
+        in_spanning_tree[random_node.x * tree_height + random_node.y] = True
+        frontier = [(random_node, n) for n in random_node.edges]
+
+        while frontier:
+            i = self.rng.randrange(len(frontier))
+            frontier[i], frontier[-1] = frontier[-1], frontier[i]
+            node, random_edge = frontier.pop()
+            if in_spanning_tree[random_edge.x * tree_height + random_edge.y]:
+                continue
+            in_spanning_tree[random_edge.x * tree_height + random_edge.y] = True
+            HEdge(node, random_edge).connect_nodes()
+            frontier.extend((random_edge, n) for n in random_edge.edges if not in_spanning_tree[n.x * tree_height + n.y])
+        return st_nodes
+
+    @classmethod
+    def from_order(cls, width, height, order, node_nos=None, seed=None) -> "HamiltonianCycle":
+        # order - индексы клеток x * height + y в порядке обхода цикла
+        hc = cls.__new__(cls)
+        hc.width = width
+        hc.height = height
+        hc.seed = seed if seed is not None else new_seed()
+        hc.rng = random.Random(hc.seed)
+
+        # Узлы создаются лениво, чтобы загрузка большого цикла не зависела от его размера
+        hc.cycle = CycleNodes(order, height)
+        hc.create_lookup_tables(node_nos)
+        return hc
+
+    def get_order(self) -> list[int]:
+        return [n.x * self.height + n.y for n in self.cycle]
+
+    def create_lookup_tables(self, node_nos=None):
+        if node_nos is None:
+            node_nos = [-1] * (self.width * self.height)
+            for n in self.cycle:
+                node_nos[n.x * self.height + n.y] = n.cycle_no
+        self.node_nos = node_nos
+        self.neighbour_node_nos = [None] * len(self.cycle)
+
+    def get_neighbour_node_nos(self, node_no: int) -> list[int]:
+        neighbours = self.neighbour_node_nos[node_no]
+        if neighbours is None:
+            n = self.cycle[node_no]
+            neighbours = [
+                self.get_node_no(x, y)
+                for x, y in ((n.x - 1, n.y), (n.x, n.y - 1), (n.x, n.y + 1), (n.x + 1, n.y))
+                if 0 <= x < self.width and 0 <= y < self.height
+            ]
+            self.neighbour_node_nos[node_no] = neighbours
+        return neighbours
 
-        for n in st_nodes:
-            n.set_edges(st_nodes)
-
-        spanning_tree: list[HEdge] = []
-        random_node = st_nodes[random.randint(0, len(st_nodes) - 1)]
-        spanning_tree.append(HEdge(random_node, random_node.edges[0]))
-        nodes_in_spanning_tree = [random_node, random_node.edges[0]]
+    def get_node_no(self, x, y) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.node_nos[x * self.height + y]
+        return -1
 
-        while len(nodes_in_spanning_tree) < len(st_nodes):
-            random_node = random.choice(nodes_in_spanning_tree)
-            edges = [n for n in random_node.edges if n not in nodes_in_spanning_tree]
-            if len(edges) != 0:
-                random_edge = random.choice(edges)
-                nodes_in_spanning_tree.append(random_edge)
-                spanning_tree.append(HEdge(random_node, random_edge))
 
-        for n in st_nodes:
-            n.set_spanning_tree_edges(spanning_tree)
+class CycleNodes:
+    def __init__(self, order, height):
+        self.order = order
+        self.height = height
+        self.nodes: dict[int, HNode] = {}
 
-        self.spanning_tree = spanning_tree
-        self.spanning_tree_nodes = st_nodes
+    def __len__(self):
+        return len(self.order)
 
-    def get_node_no(self, x, y) -> int:
-        for i in range(0, len(self.cycle)):
-            if self.cycle[i].x == x and self.cycle[i].y == y:
-                return i
-        return -1
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        node = self.nodes.get(i)
+        if node is None:
+            index = self.order[i]
+            node = HNode(index // self.height, index % self.height)
+            node.cycle_no = i
+            self.nodes[i] = node
+        return node
 
-    def get_possible_positions_from(self, x, y):
-        current_node = self.cycle[self.get_node_no(x, y)]
-        node_nos = []
-        for n in current_node.edges:
-            node_nos.append(self.get_node_no(n.x, n.y))
-        return node_nos
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
 
 
 class HNode:
+    __slots__ = ('x', 'y', 'spanning_tree_adjacent_nodes', 'cycle_no', 'edges')
+
     def __init__(self, x: int, y: int):
         self.x = x
         self.y = y
         self.spanning_tree_adjacent_nodes: list[HNode] = []
         self.cycle_no = -1
-        self.already_visited = False
-        self.shortest_distance_to_this_point = 0
         self.edges: list[HNode] = []
 
-    def set_edges(self, all_nodes: list["HNode"]):
-        self.edges = [n for n in all_nodes if (dist(n.x, n.y, self.x, self.y) == 1)]
-
-    def set_spanning_tree_edges(self, spanning_tree: list["HEdge"]):
-        for e in spanning_tree:
-            if e.contains(self):
-                self.spanning_tree_adjacent_nodes.append(e.get_other_node(self))
-
     def get_direction_to(self, other):
         return {'x': other.x - self.x, 'y': other.y - self.y}
 
-    def reset_for_a_star(self):
-        self.already_visited = False
-        self.shortest_distance_to_this_point = 0
-
     def __repr__(self):
         return '(' + str(self.x) + ', ' + str(self.y) + ')'
 
 
 class HEdge:
+    __slots__ = ('node1', 'node2')
+
     def __init__(self, node1: HNode, node2: HNode):
         self.node1 = node1
         self.node2 = node2
 
-    def is_equal_to(self, other_edge: "HEdge") -> bool:
-        return (self.node1 == other_edge.node1 and self.node2 == other_edge.node2) or (
-                self.node1 == other_edge.node2 and self.node2 == other_edge.node1)
-
-    def contains(self, n: HNode) -> bool:
-        return n == self.node1 or n == self.node2
-
-    def get_other_node(self, n: HNode) -> HNode:
-        if n == self.node1:
-            return self.node2
-        else:
-            return self.node1
-
     def connect_nodes(self) -> None:
         self.node1.spanning_tree_adjacent_nodes.append(self.node2)
         self.node2.spanning_tree_adjacent_nodes.append(self.node1)
@@ -224,26 +253,12 @@ class HPath:
     def get_last_node(self) -> HNode:
         return self.nodes_in_path[-1]
 
-    def get_snake_tail_position_after_following_path(self, game) -> Vector | HNode:
-        if self.path_length - game.snake.add_count < len(game.tail_blocks):
-            return game.tail_blocks[max(0, self.path_length - game.snake.add_count)]
-        tail_moved = self.path_length - game.snake.add_count
-        return self.nodes_in_path[tail_moved - len(game.tail_blocks)]
-
     def get_next_move(self):
         x = self.nodes_in_path[self.path_counter + 1].x - self.nodes_in_path[self.path_counter].x
         y = self.nodes_in_path[self.path_counter + 1].y - self.nodes_in_path[self.path_counter].y
         self.path_counter += 1
         return {'x': x, 'y': y}
 
-    def clone(self) -> "HPath":
-        clone = HPath(self.nodes_in_path[0], self.finish_node)
-        clone.nodes_in_path = self.nodes_in_path.copy()
-        clone.path_length = self.path_length
-        clone.distance_to_apple = self.distance_to_apple
-
-        return clone
-
     def __repr__(self):
         s = ''
         for n in self.nodes_in_path:
@@ -254,10 +269,24 @@ class HPath:
         return s.strip()
 
 
+def link_grid_nodes(nodes: list[HNode], width: int, height: int):
+    # nodes лежат по столбцам: узел (x, y) под индексом x * height + y
+    for n in nodes:
+        n.edges = []
+        if n.x > 0:
+            n.edges.append(nodes[(n.x - 1) * height + n.y])
+        if n.y > 0:
+            n.edges.append(nodes[n.x * height + n.y - 1])
+        if n.y < height - 1:
+            n.edges.append(nodes[n.x * height + n.y + 1])
+        if n.x < width - 1:
+            n.edges.append(nodes[(n.x + 1) * height + n.y])
+
+
 def dist(x1, y1, x2, y2):
     return math.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
 
 
 if __name__ == '__main__':
     hc = HamiltonianCycle(40, 20)
-    print(hc.spanning_tree_nodes)
+    print(hc.cycle)
@@ -0,0 +1,482 @@
+import heapq
+import math
+import time
+from array import array
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from app import profiling
+from app.game_core import Direction, TCoord
+from app.hamiltonian_cycle import HamiltonianCycle, HPath, dist
+
+if TYPE_CHECKING:
+    from app.hamilton_game import HamiltonGame
+
+MIN_DISTANCE_BETWEEN_HEAD_AND_TAIL = 50
+# Сколько раскрытий узлов делается между проверками часов в поиске с бюджетом времени
+DEADLINE_CHECK_INTERVAL = 32
+# Если фоновый поиск длится дольше стольких тиков, ThreadedPlanner ищет прямо в тике
+MAX_LOOKAHEAD = 50
+
+
+def over_takes_tail_no(new_pos_no: int, head_no: int, tail_no: int, add_count: int, size: int) -> bool:
+    # Расстояния считаются вдоль цикла из size клеток
+    if (tail_no - head_no) % size <= MIN_DISTANCE_BETWEEN_HEAD_AND_TAIL + add_count:
+        return True
+    tail = (tail_no - MIN_DISTANCE_BETWEEN_HEAD_AND_TAIL - add_count) % size
+    return (new_pos_no - head_no) % size >= (tail - head_no) % size
+
+
+def next_cycle_node_no(hc: HamiltonianCycle, head_no: int, tail_no: int, apple_no: int, add_count: int) -> int:
+    # Ближайший к яблоку по циклу сосед, не обгоняющий хвост; иначе просто следующая клетка цикла.
+    # Только арифметика по таблицам цикла, без поиска
+    size = len(hc.cycle)
+    next_no = (head_no + 1) % size
+    min_distance = (apple_no - next_no) % size
+    for n in hc.get_neighbour_node_nos(head_no):
+        distance = (apple_no - n) % size
+        if distance < min_distance and not over_takes_tail_no(n, head_no, tail_no, add_count, size):
+            next_no = n
+            min_distance = distance
+    return next_no
+
+
+def direction_between(start: TCoord, end: TCoord) -> Direction:
+    vel_x = end[0] - start[0]
+    vel_y = end[1] - start[1]
+    if vel_x == -1 and vel_y == 0:
+        return Direction.LEFT
+    elif vel_x == 1 and vel_y == 0:
+        return Direction.RIGHT
+    elif vel_x == 0 and vel_y == -1:
+        return Direction.UP
+    elif vel_x == 0 and vel_y == 1:
+        return Direction.DOWN
+    raise ValueError(f"Unknown velocity: {vel_x}, {vel_y}")
+
+
+def follow_cycle(game: "HamiltonGame") -> Direction:
+    next_pos = game.get_next_position()
+    return direction_between(game.snake.body[0], (next_pos.x, next_pos.y))
+
+
+def follow_path(game: "HamiltonGame", path: HPath) -> Direction:
+    next_move = path.get_next_move()
+    head = game.snake.body[0]
+    return direction_between(head, (head[0] + next_move['x'], head[1] + next_move['y']))
+
+
+class Planner:
+    """Выбирает направление змейки HamiltonGame на каждый тик.
+
+    Планировщик хранит состояние одной игры, поэтому каждой игре нужен свой экземпляр.
+    """
+
+    # Путь, по которому планировщик сейчас ведёт змейку, если он есть (для отрисовки)
+    path: HPath | None = None
+    # Одинаковые игры дают одинаковые ходы (не зависят от скорости машины)
+    is_deterministic = True
+
+    def on_food_spawned(self, game: "HamiltonGame"):
+        pass
+
+    def next_direction(self, game: "HamiltonGame") -> Direction:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class CycleShortcutPlanner(Planner):
+    """Срезает по циклу к яблоку только арифметикой расстояний: O(1) на ход, без всплесков на яблоках."""
+
+    def next_direction(self, game: "HamiltonGame") -> Direction:
+        return follow_cycle(game)
+
+
+class AStarShortcutPlanner(Planner):
+    """Ищет A* безопасный путь к каждому новому яблоку, в остальное время идёт по циклу."""
+
+    def __init__(self):
+        self.path: HPath | None = None
+
+    def on_food_spawned(self, game: "HamiltonGame"):
+        self.calculate_path(game)
+
+    @profiling.timed('hamilton.calculate_path')
+    def calculate_path(self, game: "HamiltonGame"):
+        self.path = ShortcutSearch(game).run()
+        game.notify('on_path_changed')
+
+    def next_direction(self, game: "HamiltonGame") -> Direction:
+        if not self.path or self.path.path_counter >= self.path.path_length:
+            self.calculate_path(game)
+
+        if not self.path or not self.path.path_length:
+            return follow_cycle(game)
+        return follow_path(game, self.path)
+
+
+class AnytimePlanner(Planner):
+    """A* с бюджетом на тик: не больше max_nodes раскрытий и, если задано, max_seconds времени.
+
+    Поиск к яблоку продолжается с того же места на следующих тиках. Пока путь не найден, змейка
+    делает первый шаг к лучшей вершине фронта (шаги дерева поиска безопасны по правилу хвоста),
+    и этот шаг становится новым корнем. Если поиск исчерпан, змейка до следующего яблока идёт по циклу.
+    """
+
+    def __init__(self, max_nodes=200, max_seconds: float | None = None):
+        if max_nodes < 1:
+            raise ValueError("max_nodes must be positive")
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+        self.path: HPath | None = None
+        self.search: ShortcutSearch | None = None
+
+    def on_food_spawned(self, game: "HamiltonGame"):
+        self.path = None
+        self.search = ShortcutSearch(game)
+        game.notify('on_path_changed')
+
+    def next_direction(self, game: "HamiltonGame") -> Direction:
+        if self.path and self.path.path_counter < self.path.path_length:
+            return follow_path(game, self.path)
+        if self.search is None:
+            return follow_cycle(game)
+
+        deadline = None if self.max_seconds is None else time.perf_counter() + self.max_seconds
+        path = self.search.step(self.max_nodes, deadline)
+        if path is not None:
+            # Змейка уже прошла по пути до текущего корня поиска
+            path.path_counter = self.search.root_length
+            self.path = path
+            self.search = None
+            game.notify('on_path_changed')
+            return follow_path(game, self.path)
+
+        if self.search.is_exhausted():
+            self.search = None
+            return follow_cycle(game)
+
+        node = game.cycle[self.search.commit()]
+        return direction_between(game.snake.body[0], (node.x, node.y))
+
+
+class ShortcutSearch:
+    # Поиск не читает игру после конструктора, поэтому его можно запускать в другом потоке.
+    # lookahead: искать от состояния, в котором змейка окажется через столько тиков движения по циклу
+    def __init__(self, game: "HamiltonGame", lookahead=0):
+        self.hc = game.hc
+        self.cycle = game.cycle
+        self.size = len(self.cycle)
+        self.apple_no = self.hc.get_node_no(game.food[0], game.food[1])
+        self.add_count = game.snake.add_count
+        # Снимок тела в номерах цикла от хвоста к голове; голова не входит в tail_length
+        self.body_nos = array('i', (self.hc.get_node_no(x, y) for x, y in reversed(game.snake.body)))
+        is_apple_eaten = lookahead and self.follow_cycle(lookahead)
+        self.start_no = self.body_nos[-1]
+        self.tail_length = len(self.body_nos) - 1
+
+        # Пути хранятся цепочками ссылок на родителя: запись i - это узел nodes[i]
+        # на расстоянии lengths[i] от головы, предыдущий узел пути - запись parents[i].
+        # jumps[i] - предок записи для прыжков по глубине (скью-бинарные указатели):
+        # предок на любой глубине находится за O(log длины пути), а не проходом по всем родителям
+        self.nodes: list[int] = [self.start_no]
+        self.parents: list[int] = [-1]
+        self.lengths: list[int] = [0]
+        self.jumps: list[int] = [0]
+        self.shortest_distances: list[float] = [math.inf] * len(self.cycle)
+        # Если змейка съест яблоко раньше, чем дойдёт до старта, искать нечего
+        self.heap: list[tuple[float, int]] = [] if is_apple_eaten else [(self.distance_to_apple(self.start_no), 0)]
+        self.is_stopped = False
+
+        # Корень поддерева, в котором идёт поиск после commit(). Принадлежность записи поддереву
+        # проверяется лениво при извлечении из кучи и кэшируется до следующего commit()
+        self.root = 0
+        self.root_length = 0
+        self.epoch = 0
+        self.checked_epochs: list[int] = [0]
+        self.checked_results: list[bool] = [True]
+
+    def follow_cycle(self, ticks: int) -> bool:
+        # Сдвигает снимок на ticks ходов по правилу follow_cycle; True, если по пути съедено яблоко
+        body = deque(self.body_nos)
+        for _ in range(ticks):
+            next_no = next_cycle_node_no(self.hc, body[-1], body[0], self.apple_no, self.add_count)
+            if next_no == self.apple_no:
+                return True
+            body.append(next_no)
+            body.popleft()
+            self.add_count = max(0, self.add_count - 1)
+        self.body_nos = array('i', body)
+        return False
+
+    def distance_to_apple(self, node_no: int) -> float:
+        node = self.cycle[node_no]
+        apple = self.cycle[self.apple_no]
+        return dist(apple.x, apple.y, node.x, node.y)
+
+    def run(self) -> HPath | None:
+        path = self.step()
+        if profiling.enabled:
+            profiling.count('a_star.searches')
+            profiling.count('a_star.generated', len(self.nodes))
+        return path
+
+    def step(self, max_nodes: int | None = None, deadline: float | None = None) -> HPath | None:
+        # Раскрывает узлы, пока не найден путь или не кончился бюджет; поиск можно продолжить
+        path = None
+        expanded = 0
+        while self.heap and not self.is_stopped:
+            if max_nodes is not None and expanded >= max_nodes:
+                break
+            if deadline is not None and expanded and expanded % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() >= deadline:
+                break
+            _, record = heapq.heappop(self.heap)
+            if self.root_length and not self.is_in_subtree(record):
+                continue
+            node_no = self.nodes[record]
+            if node_no == self.apple_no:
+                path = self.build_path(record)
+                break
+            self.expand(record)
+            expanded += 1
+        if profiling.enabled:
+            profiling.count('a_star.expanded', expanded)
+        return path
+
+    def is_exhausted(self) -> bool:
+        self.discard_foreign()
+        return self.is_stopped or not self.heap
+
+    def commit(self) -> int:
+        # Первый шаг к лучшей вершине фронта становится новым корнем; возвращает номер его клетки
+        self.discard_foreign()
+        record = self.heap[0][1]
+        while self.lengths[record] > self.root_length + 1:
+            record = self.parents[record]
+
+        self.root = record
+        self.root_length += 1
+        self.epoch += 1
+        self.checked_epochs[record] = self.epoch
+        self.checked_results[record] = True
+        return self.nodes[record]
+
+    def discard_foreign(self):
+        while self.heap and not self.is_in_subtree(self.heap[0][1]):
+            heapq.heappop(self.heap)
+
+    def is_in_subtree(self, record: int) -> bool:
+        chain = []
+        while self.checked_epochs[record] != self.epoch:
+            # Корень помечен в своей эпохе, поэтому на его глубине остаются только чужие ветки
+            if self.lengths[record] <= self.root_length:
+                result = False
+                break
+            chain.append(record)
+            record = self.parents[record]
+        else:
+            result = self.checked_results[record]
+
+        for record in chain:
+            self.checked_epochs[record] = self.epoch
+            self.checked_results[record] = result
+        return result
+
+    def expand(self, record: int):
+        node_no = self.nodes[record]
+        length = self.lengths[record]
+        if length >= self.shortest_distances[node_no]:
+            return
+        self.shortest_distances[node_no] = length
+
+        tail_no = self.get_tail_after(record)
+        for n in self.hc.get_neighbour_node_nos(node_no):
+            if over_takes_tail_no(n, node_no, tail_no, self.add_count, self.size) and n != node_no + 1:
+                continue
+            if length + 1 > self.shortest_distances[n]:
+                continue
+            jump = self.jumps[record]
+            if length - self.lengths[jump] == self.lengths[jump] - self.lengths[self.jumps[jump]]:
+                jump = self.jumps[jump]
+            else:
+                jump = record
+            self.nodes.append(n)
+            self.parents.append(record)
+            self.lengths.append(length + 1)
+            self.jumps.append(jump)
+            self.checked_epochs.append(-1)
+            self.checked_results.append(False)
+            heapq.heappush(self.heap, (length + 1 + self.distance_to_apple(n), len(self.nodes) - 1))
+
+    def stop(self):
+        self.is_stopped = True
+
+    def is_safe(self, node_nos: list[int]) -> bool:
+        # Проверяет готовый путь от текущей головы по тем же правилам, по которым его строит expand
+        for length in range(len(node_nos) - 1):
+            node_no = node_nos[length]
+            n = node_nos[length + 1]
+            tail_moved = length - self.add_count
+            if tail_moved < self.tail_length:
+                tail_no = self.body_nos[max(0, tail_moved)]
+            else:
+                tail_no = node_nos[tail_moved - self.tail_length]
+            if over_takes_tail_no(n, node_no, tail_no, self.add_count, self.size) and n != node_no + 1:
+                return False
+        return True
+
+    def get_tail_after(self, record: int) -> int:
+        tail_moved = self.lengths[record] - self.add_count
+        if tail_moved < self.tail_length:
+            return self.body_nos[max(0, tail_moved)]
+        # Хвост уже идёт по самому пути: он в узле пути на глубине tail_moved - tail_length
+        return self.nodes[self.get_ancestor(record, tail_moved - self.tail_length)]
+
+    def get_ancestor(self, record: int, length: int) -> int:
+        while self.lengths[record] > length:
+            jump = self.jumps[record]
+            record = jump if self.lengths[jump] >= length else self.parents[record]
+        return record
+
+    def build_path(self, record: int) -> HPath:
+        node_nos = []
+        while record != -1:
+            node_nos.append(self.nodes[record])
+            record = self.parents[record]
+        node_nos.reverse()
+
+        path = HPath(self.cycle[node_nos[0]], self.cycle[self.apple_no])
+        for node_no in node_nos[1:]:
+            path.add_to_tail(self.cycle[node_no])
+        return path
+
+
+class ThreadedPlanner(AStarShortcutPlanner):
+    """Тот же A*, но в рабочем потоке: пока путь ищется, змейка идёт по циклу, и тик не ждёт поиска.
+
+    Поиск стартует из клетки цикла, до которой голова дойдёт к его окончанию: упреждение в тиках
+    оценивается по длительности прошлого поиска и интервалу между тиками. Если путь готов раньше,
+    змейка доходит по циклу до его начала; если голова уже прошла начало, путь отбрасывается.
+    На каждое яблоко запускается один поиск. Когда тики идут настолько быстро, что упреждение
+    больше max_lookahead (ускоренная перемотка), фоновый результат всё равно бы устарел,
+    и поиск выполняется прямо в тике, как в AStarShortcutPlanner.
+    """
+
+    is_deterministic = False
+
+    def __init__(self, max_lookahead=MAX_LOOKAHEAD):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='planner')
+        self.max_lookahead = max_lookahead
+        self.search: ShortcutSearch | None = None
+        self.future: Future | None = None
+        self.apple = None
+        self.lookahead = 0
+        # Найденный путь, к началу которого голова ещё идёт по циклу, и сколько тиков прошло с запуска поиска
+        self.pending: HPath | None = None
+        self.waited = 0
+        # Убывающий максимум длительности поиска: она сильно зависит от расстояния до яблока
+        self.search_seconds: float | None = None
+        # Интервал между тиками без времени самого планировщика
+        self.tick_seconds: float | None = None
+        self.last_tick_at: float | None = None
+
+    def on_food_spawned(self, game: "HamiltonGame"):
+        # Тело змейки дорастает уже после этого вызова, поэтому поиск запускается в следующем тике
+        if self.search is not None:
+            self.search.stop()
+        self.search = None
+        self.future = None
+        self.path = None
+        self.pending = None
+        game.notify('on_path_changed')
+
+    def calculate_path(self, game: "HamiltonGame"):
+        # Неудачный или устаревший поиск не повторяется до следующего яблока
+        if self.apple == game.food:
+            return
+        self.apple = game.food
+        self.waited = 0
+        self.lookahead = self.get_lookahead()
+        if self.lookahead > self.max_lookahead:
+            self.path = self.run_search(ShortcutSearch(game))
+            game.notify('on_path_changed')
+            return
+
+        search = ShortcutSearch(game, self.lookahead)
+        if search.is_exhausted():
+            # За время поиска змейка и так дойдёт до яблока по циклу
+            return
+        self.search = search
+        self.future = self.executor.submit(self.run_search, search)
+
+    def get_lookahead(self) -> int:
+        # Пока длительность поиска неизвестна, первый поиск идёт прямо в тике
+        if self.search_seconds is None:
+            return self.max_lookahead + 1
+        if not self.tick_seconds:
+            return 0
+        return 2 * math.ceil(self.search_seconds / self.tick_seconds)
+
+    @profiling.timed('hamilton.threaded_search')
+    def run_search(self, search: ShortcutSearch) -> HPath | None:
+        start = time.perf_counter()
+        path = search.run()
+        elapsed = time.perf_counter() - start
+        self.search_seconds = elapsed if self.search_seconds is None else max(elapsed, 0.8 * self.search_seconds)
+        return path
+
+    def next_direction(self, game: "HamiltonGame") -> Direction:
+        if self.last_tick_at is not None:
+            interval = time.perf_counter() - self.last_tick_at
+            self.tick_seconds = interval if self.tick_seconds is None else 0.75 * self.tick_seconds + 0.25 * interval
+
+        if self.future is not None and self.future.done():
+            path = self.future.result()
+            self.future = None
+            if path is not None and self.apple == game.food:
+                self.pending = path
+        if self.pending is not None:
+            self.accept(game)
+        direction = super().next_direction(game)
+        self.waited += 1
+        self.last_tick_at = time.perf_counter()
+        return direction
+
+    def accept(self, game: "HamiltonGame"):
+        path = self.pending
+        head = game.snake.body[0]
+        nodes = path.nodes_in_path
+        hc = game.hc
+        for i, node in enumerate(nodes):
+            if (node.x, node.y) == head:
+                break
+        else:
+            # Голова ещё не дошла до начала пути или уже прошла его, и путь устарел
+            if self.waited >= self.lookahead:
+                self.pending = None
+            return
+
+        self.pending = None
+        if not ShortcutSearch(game).is_safe([hc.get_node_no(n.x, n.y) for n in nodes[i:]]):
+            return
+        path.path_counter = i
+        self.path = path
+        game.notify('on_path_changed')
+
+    def close(self):
+        if self.search is not None:
+            self.search.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Планировщики по именам для бенчмарков и пакетных прогонов
+PLANNERS: dict[str, type[Planner]] = {
+    'a_star': AStarShortcutPlanner,
+    'cycle_shortcut': CycleShortcutPlanner,
+    'anytime': AnytimePlanner,
+    'threaded': ThreadedPlanner,
+}
@@ -0,0 +1,180 @@
+import json
+import math
+import time
+from collections import defaultdict
+
+DEFAULT_PATH = 'profile.jsonl'
+DEFAULT_INTERVAL = 5.0
+PERCENTILES = (50, 90, 99)
+# По этому таймеру считается число тиков в секунду
+TICK_TIMER = 'game.tick'
+
+enabled = False
+path: str | None = None
+# None - сводки не пишутся по времени, только в report() и disable()
+interval: float | None = DEFAULT_INTERVAL
+timings: dict[str, list[int]] = defaultdict(list)
+counters: dict[str, int] = defaultdict(int)
+started_at = 0
+next_report_at = 0
+
+# (класс, имя атрибута, исходная функция, метка) для всех методов под @timed
+instrumented: list[tuple[type, str, object, str]] = []
+
+
+class TimedMethod:
+    def __init__(self, func, label: str):
+        self.func = func
+        self.label = label
+
+    def __set_name__(self, owner, name):
+        setattr(owner, name, self.func)
+        instrumented.append((owner, name, self.func, self.label))
+        if enabled:
+            setattr(owner, name, wrap(self.func, self.label))
+
+
+def timed(label: str):
+    """Помечает метод класса как замеряемый.
+
+    Пока профилирование выключено, в классе лежит исходная функция и замер ничего не стоит:
+    обёртки подставляются только в enable() и снимаются в disable().
+    """
+    return lambda func: TimedMethod(func, label)
+
+
+def wrap(func, label: str):
+    durations = timings[label]
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            durations.append(time.perf_counter_ns() - start)
+            if start >= next_report_at:
+                maybe_report()
+
+    wrapper.__name__ = func.__name__
+    wrapper.__qualname__ = func.__qualname__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def count(label: str, value=1):
+    # Вызывающий код проверяет enabled сам, если подсчёт стоит дороже одного вызова
+    if enabled:
+        counters[label] += value
+
+
+def enable(report_path: str | None = DEFAULT_PATH, report_interval: float | None = DEFAULT_INTERVAL):
+    global enabled, path, interval
+    if enabled:
+        disable()
+    enabled = True
+    path = report_path
+    interval = report_interval
+    reset()
+    for owner, name, func, label in instrumented:
+        setattr(owner, name, wrap(func, label))
+
+
+def enable_in_worker():
+    """Включает замеры в процессе-воркере: без файла и периодических сводок.
+
+    Замеры воркер отдаёт через take(), а родитель добавляет их к своим через merge().
+    """
+    global path
+    # При fork воркер наследует путь родителя: его сводки туда писать нельзя
+    path = None
+    enable(None, None)
+
+
+def init_worker(is_enabled: bool):
+    # Инициализатор пула: воркер профилирует, только если профилирует родитель
+    if is_enabled:
+        enable_in_worker()
+
+
+def take() -> dict:
+    # Забирает накопленные замеры и начинает копить заново
+    data = {
+        'timings': {label: list(durations) for label, durations in timings.items() if durations},
+        'counters': dict(counters),
+    }
+    for durations in timings.values():
+        durations.clear()
+    counters.clear()
+    return data
+
+
+def merge(data: dict):
+    for label, durations in data['timings'].items():
+        # Дописываем на месте: обёртки держат ссылки на эти списки
+        timings[label].extend(durations)
+    for label, value in data['counters'].items():
+        counters[label] += value
+
+
+def disable() -> dict:
+    global enabled
+    summary = report()
+    enabled = False
+    for owner, name, func, _ in instrumented:
+        setattr(owner, name, func)
+    return summary
+
+
+def reset():
+    global started_at, next_report_at
+    # Очищаем на месте: обёртки держат ссылки на эти списки
+    for durations in timings.values():
+        durations.clear()
+    counters.clear()
+    started_at = time.perf_counter_ns()
+    next_report_at = math.inf if interval is None else started_at + int(interval * 1_000_000_000)
+
+
+def percentile(sorted_values: list[int], p: int) -> int:
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * p // 100)]
+
+
+def summarize() -> dict:
+    elapsed = (time.perf_counter_ns() - started_at) / 1_000_000_000
+    stages = {}
+    for label, durations in timings.items():
+        if not durations:
+            continue
+        values = sorted(durations)
+        stage = {
+            'count': len(values),
+            'total_s': sum(values) / 1_000_000_000,
+            'mean_us': sum(values) / len(values) / 1000,
+            'max_us': values[-1] / 1000,
+        }
+        for p in PERCENTILES:
+            stage[f'p{p}_us'] = percentile(values, p) / 1000
+        stages[label] = stage
+    return {
+        'time': time.time(),
+        'elapsed_s': elapsed,
+        'ticks_per_s': len(timings[TICK_TIMER]) / elapsed if elapsed else None,
+        'stages': stages,
+        'counters': dict(counters),
+    }
+
+
+def report() -> dict:
+    """Пишет сводку за прошедший интервал строкой JSON и начинает новый интервал."""
+    summary = summarize()
+    if path is not None:
+        with open(path, 'a') as f:
+            f.write(json.dumps(summary) + '\n')
+    reset()
+    return summary
+
+
+def maybe_report():
+    if enabled and time.perf_counter_ns() >= next_report_at:
+        report()
@@ -0,0 +1,137 @@
+import struct
+from typing import BinaryIO, Iterator
+
+from app.game_core import Direction, Game, GameObserver, Snake, TCoord
+
+EXTENSION = '.replay'
+MAGIC = b'SNKR'
+VERSION = 1
+# magic, version, width, height, seed, длина начального тела
+HEADER = struct.Struct('<4sIIIQI')
+CELL = struct.Struct('<II')
+# Число тиков дописывается в конец файла при закрытии
+FOOTER = struct.Struct('<Q')
+
+# Направление кодируется своим значением в двух битах, по четыре тика в байте
+DIRECTIONS = tuple(Direction)
+TICKS_PER_BYTE = 4
+BUFFER_SIZE = 64 * 1024
+
+
+class ReplayWriter(GameObserver):
+    """Записывает партию потоком: заголовок, затем направление змейки на каждом тике.
+
+    Писатель нужно подключить до первого тика, после add_snake. Память не растёт
+    с длиной партии: коды копятся в буфере фиксированного размера.
+    """
+
+    def __init__(self, file: BinaryIO | str, game: Game, buffer_size=BUFFER_SIZE):
+        if game.snake is None:
+            raise ValueError("Snake must be added before recording")
+
+        self.owns_file = isinstance(file, str)
+        self.file = open(file, 'wb') if self.owns_file else file
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.byte = 0
+        self.ticks = 0
+        self.is_closed = False
+
+        body = game.snake.body
+        self.file.write(HEADER.pack(MAGIC, VERSION, game.width, game.height, game.seed, len(body)))
+        for x, y in body:
+            self.file.write(CELL.pack(x, y))
+
+        self.game = game
+        game.add_observer(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def on_tick(self, game: Game):
+        if not self.is_closed:
+            self.write(game.snake.direction)
+
+    def on_game_over(self, game: Game):
+        self.close()
+
+    def write(self, direction: Direction):
+        shift = 2 * (self.ticks % TICKS_PER_BYTE)
+        self.byte |= direction << shift
+        self.ticks += 1
+        if self.ticks % TICKS_PER_BYTE == 0:
+            self.buffer.append(self.byte)
+            self.byte = 0
+            if len(self.buffer) >= self.buffer_size:
+                self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        if self.is_closed:
+            return
+        self.is_closed = True
+
+        if self.ticks % TICKS_PER_BYTE:
+            self.buffer.append(self.byte)
+        self.flush()
+        self.file.write(FOOTER.pack(self.ticks))
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class Replay:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            magic, version, self.width, self.height, self.seed, body_length = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a replay file")
+            self.body: list[TCoord] = [CELL.unpack(file.read(CELL.size)) for _ in range(body_length)]
+            self.data_offset = file.tell()
+
+            file.seek(-FOOTER.size, 2)
+            self.data_end = file.tell()
+            self.ticks, = FOOTER.unpack(file.read(FOOTER.size))
+
+        if self.data_end - self.data_offset != -(-self.ticks // TICKS_PER_BYTE):
+            raise ValueError(f"{path} is truncated")
+
+    def directions(self, chunk_size=BUFFER_SIZE) -> Iterator[Direction]:
+        remaining = self.ticks
+        with open(self.path, 'rb') as file:
+            file.seek(self.data_offset)
+            while remaining > 0:
+                chunk = file.read(min(chunk_size, self.data_end - file.tell()))
+                for byte in chunk:
+                    for _ in range(min(TICKS_PER_BYTE, remaining)):
+                        yield DIRECTIONS[byte & 3]
+                        byte >>= 2
+                        remaining -= 1
+
+    def create_game(self) -> Game:
+        # Повторяем ту же последовательность, что и при записи, чтобы ГСЧ выдал ту же еду
+        game = Game(self.width, self.height, seed=self.seed)
+        snake = Snake()
+        game.add_snake(snake)
+        if list(snake.body) != self.body:
+            snake.body = self.body
+        game.spawn_food()
+        return game
+
+
+def play(replay: Replay, game: Game | None = None) -> Iterator[Game]:
+    """Проигрывает запись, отдавая игру после каждого тика."""
+    if game is None:
+        game = replay.create_game()
+    for direction in replay.directions():
+        game.snake.direction = direction
+        game.tick()
+        yield game
@@ -0,0 +1,14 @@
+import random
+import secrets
+
+SEED_BITS = 63
+
+
+def new_seed() -> int:
+    # Берётся из энтропии ОС, а не из глобального random, чтобы не зависеть от чужих random.seed()
+    return secrets.randbits(SEED_BITS)
+
+
+def derive_seed(seed: int, *keys) -> int:
+    """Детерминированно выводит независимое зерно, не трогая ГСЧ, созданный из seed."""
+    return random.Random('/'.join(map(str, (seed, *keys)))).getrandbits(SEED_BITS)
@@ -8,8 +8,27 @@ from app.gui.config import NANOS_PER_TICK, TICKS_PER_SECOND
 
 ASSETS_DIR = 'assets/'
 
-
-class SnakeSegmentSprite(pygame.sprite.Sprite):
+# Загруженные и отмасштабированные картинки, общие для всех спрайтов
+textures: dict[tuple[str, int, int, bool], pygame.Surface] = {}
+
+
+def load_texture(name: str, width: int, height: int, alpha=True) -> pygame.Surface:
+    key = (name, width, height, alpha)
+    texture = textures.get(key)
+    if texture is None:
+        texture = pygame.image.load(os.path.join(ASSETS_DIR, name))
+        has_display = pygame.display.get_surface() is not None
+        if has_display:
+            texture = texture.convert_alpha() if alpha else texture.convert()
+        texture = pygame.transform.scale(texture, (width, height))
+        # До set_mode картинку не сконвертировать: в кэш её не кладём, иначе все следующие
+        # спрайты рисовались бы медленной неконвертированной поверхностью
+        if has_display:
+            textures[key] = texture
+    return texture
+
+
+class SnakeSegmentSprite(pygame.sprite.DirtySprite):
     containers = None
 
     def __init__(self, position, is_head=False, width=10, height=10):
@@ -20,19 +39,22 @@ class SnakeSegmentSprite(pygame.sprite.Sprite):
 
         self.is_head = is_head
 
-        self.image = pygame.image.load(os.path.join(ASSETS_DIR, 'snake_head.png' if is_head else 'snake_body.png'))
-        self.image = pygame.transform.scale(self.image, (self.width, self.height))
+        self.image = load_texture('snake_head.png' if is_head else 'snake_body.png', self.width, self.height)
 
         self.rect = self.image.get_rect()
         self.rect.x = position[0] * self.width
         self.rect.y = position[1] * self.height
 
     def update_position(self, position):
-        self.rect.x = position[0] * self.width
-        self.rect.y = position[1] * self.height
+        x = position[0] * self.width
+        y = position[1] * self.height
+        if x != self.rect.x or y != self.rect.y:
+            self.rect.x = x
+            self.rect.y = y
+            self.dirty = 1
 
 
-class SnakeFuturePathSegmentSprite(pygame.sprite.Sprite):
+class SnakeFuturePathSegmentSprite(pygame.sprite.DirtySprite):
     containers = None
 
     def __init__(self, position, game, width=10, height=10):
@@ -62,12 +84,13 @@ class SnakeFuturePathSegmentSprite(pygame.sprite.Sprite):
             if progress > 1:
                 progress = 1
             self.image.set_alpha(50 - 50 * progress)
+            self.dirty = 1
 
             if progress >= 1:
                 self.kill()
 
 
-class AppleSprite(pygame.sprite.Sprite):
+class AppleSprite(pygame.sprite.DirtySprite):
     containers = None
 
     def __init__(self, game: Game, width=10, height=10):
@@ -78,8 +101,7 @@ class AppleSprite(pygame.sprite.Sprite):
         self.width = width
         self.height = height
 
-        self.image = pygame.image.load(os.path.join(ASSETS_DIR, 'apple.png'))
-        self.image = pygame.transform.scale(self.image, (self.width, self.height))
+        self.image = load_texture('apple.png', self.width, self.height)
 
         self.rect = self.image.get_rect()
         self.rect.x = self.game.food[0] * self.width
@@ -110,6 +132,7 @@ class AppleSprite(pygame.sprite.Sprite):
                 self.game.food[0] - self.last_coordinate[0]) * self.width * progress
         self.rect.y = self.last_coordinate[1] * self.height + (
                 self.game.food[1] - self.last_coordinate[1]) * self.height * progress
+        self.dirty = 1
 
         if progress >= 1:
             self.last_coordinate = self.game.food
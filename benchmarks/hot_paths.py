@@ -0,0 +1,252 @@
+import argparse
+import json
+import platform
+import statistics
+import time
+
+import neat
+import numpy as np
+
+from app.batch_network import BatchNetwork
+from app.game_core import Game, Snake, Direction, TCoord
+from app.generation import GenerationGame
+from app.hamilton_game import HamiltonGame, HamiltonSnake
+from app.hamiltonian_cycle import HamiltonianCycle
+from app.planners import AStarShortcutPlanner, PLANNERS
+
+SIZES = [10, 20, 50, 100, 200]
+FILL_RATIOS = [0.1, 0.5, 0.9, 0.99]
+CASES = ['tick', 'spawn_food', 'cycle', 'a_star', 'planner', 'genome', 'batch_network']
+
+
+def serpentine_cycle(width, height) -> list[TCoord]:
+    # Простой гамильтонов цикл для чётной высоты: вправо по верхней строке,
+    # змейкой по остальным столбцам 1..width-1 и вверх по нулевому столбцу
+    cells = [(x, 0) for x in range(width)]
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 else range(1, width)
+        cells.extend((x, y) for x in xs)
+    cells.extend((0, y) for y in range(height - 1, 0, -1))
+    return cells
+
+
+def cycle_directions(cells: list[TCoord]) -> dict[TCoord, Direction]:
+    directions = {}
+    for i, (x, y) in enumerate(cells):
+        next_x, next_y = cells[(i + 1) % len(cells)]
+        directions[(x, y)] = {
+            (0, -1): Direction.UP,
+            (0, 1): Direction.DOWN,
+            (-1, 0): Direction.LEFT,
+            (1, 0): Direction.RIGHT,
+        }[(next_x - x, next_y - y)]
+    return directions
+
+
+def create_game(width, height, fill_ratio, game_class=Game, seed=0) -> tuple[Game, dict[TCoord, Direction]]:
+    cells = serpentine_cycle(width, height)
+    length = max(1, int(len(cells) * fill_ratio))
+    game = game_class(width, height, seed=seed)
+    snake = Snake()
+    game.add_snake(snake)
+    snake.body = cells[length - 1::-1]
+    directions = cycle_directions(cells)
+    snake.direction = directions[cells[length - 2]] if length > 1 else Direction.RIGHT
+    game.spawn_food()
+    return game, directions
+
+
+def summarize(durations: list[float], operations: int = 1) -> dict:
+    # Замеров может не быть: например, игра закончилась раньше первого поиска
+    if not durations:
+        return {'samples': 0, 'mean_s': None, 'median_s': None, 'min_s': None, 'max_s': None, 'ops_per_s': None}
+    per_operation = [d / operations for d in durations]
+    return {
+        'samples': len(durations),
+        'mean_s': statistics.fmean(per_operation),
+        'median_s': statistics.median(per_operation),
+        'min_s': min(per_operation),
+        'max_s': max(per_operation),
+        'ops_per_s': operations * len(durations) / sum(durations) if sum(durations) else None,
+    }
+
+
+def bench_tick(width, height, repeat, ticks=1000):
+    durations = []
+    games = 0
+    for _ in range(repeat):
+        # Закончившаяся игра тикает вхолостую: считаем только ходы живой змейки,
+        # а на маленьком поле, заполненном до конца, начинаем новую игру вне замера
+        duration = 0.0
+        moved = 0
+        while moved < ticks:
+            game, directions = create_game(width, height, 0.5, seed=games)
+            games += 1
+            snake = game.snake
+            start = time.perf_counter()
+            while not game.is_over and moved < ticks:
+                snake.change_direction(directions[snake.body[0]])
+                game.tick()
+                moved += 1
+            duration += time.perf_counter() - start
+        durations.append(duration)
+    return {'ticks': ticks, 'games': games}, summarize(durations, ticks)
+
+
+def bench_spawn_food(width, height, repeat, fill_ratio, calls=1000):
+    game, _ = create_game(width, height, fill_ratio)
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            game.spawn_food()
+        durations.append(time.perf_counter() - start)
+    return {'fill_ratio': fill_ratio, 'calls': calls}, summarize(durations, calls)
+
+
+def bench_cycle(width, height, repeat):
+    durations = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        HamiltonianCycle(width, height, seed=i)
+        durations.append(time.perf_counter() - start)
+    return {}, summarize(durations)
+
+
+def bench_a_star(width, height, repeat, apples=20):
+    durations = []
+    for i in range(repeat):
+        planner = AStarShortcutPlanner()
+        calculate_path = planner.calculate_path
+
+        def timed_calculate_path(game):
+            start = time.perf_counter()
+            calculate_path(game)
+            durations.append(time.perf_counter() - start)
+
+        planner.calculate_path = timed_calculate_path
+        game = HamiltonGame(width, height, seed=i, planner=planner)
+        game.add_snake(HamiltonSnake())
+        while len(game.snake.body) - 4 < apples and game.tick():
+            pass
+    return {'apples': apples}, summarize(durations)
+
+
+def bench_planner(width, height, repeat, name, apples=50):
+    # Задержка каждого тика целиком: важны не только средние, но и всплески на яблоках
+    durations = []
+    moves = []
+    for i in range(repeat):
+        game = HamiltonGame(width, height, seed=i, planner=PLANNERS[name]())
+        game.add_snake(HamiltonSnake())
+        ticks = 0
+        while len(game.snake.body) - 4 < apples:
+            start = time.perf_counter()
+            is_running = game.tick()
+            durations.append(time.perf_counter() - start)
+            ticks += 1
+            if not is_running:
+                break
+        moves.append(ticks)
+    ordered = sorted(durations)
+    params = {
+        'planner': name,
+        'apples': apples,
+        'moves_mean': statistics.fmean(moves),
+        'p99_s': ordered[len(ordered) * 99 // 100] if ordered else None,
+    }
+    return params, summarize(durations)
+
+
+def create_genomes(config, count):
+    return list(neat.Population(config).population.values())[:count]
+
+
+def bench_genome(width, height, repeat, config, genomes=50):
+    nets = [neat.nn.FeedForwardNetwork.create(genome, config) for genome in create_genomes(config, genomes)]
+    game, _ = create_game(width, height, 0.5, game_class=GenerationGame)
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for net in nets:
+            net.activate(game.get_data())
+        durations.append(time.perf_counter() - start)
+    return {'genomes': len(nets)}, summarize(durations, len(nets))
+
+
+def bench_batch_network(width, height, repeat, config, genomes=50):
+    # Те же геномы и входы, что в 'genome', но сети считаются одним вызовом на всю популяцию; время - на один геном
+    network = BatchNetwork(create_genomes(config, genomes), config)
+    game, _ = create_game(width, height, 0.5, game_class=GenerationGame)
+    inputs = np.zeros((network.count, len(network.input_keys)))
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in inputs:
+            row[:] = game.get_data()
+        network.activate(inputs)
+        durations.append(time.perf_counter() - start)
+    return {'genomes': network.count}, summarize(durations, network.count)
+
+
+def run(cases, sizes, repeat, config_path) -> list[dict]:
+    config = None
+    if 'genome' in cases or 'batch_network' in cases:
+        config = neat.config.Config(
+            neat.DefaultGenome,
+            neat.DefaultReproduction,
+            neat.DefaultSpeciesSet,
+            neat.DefaultStagnation,
+            config_path
+        )
+
+    results = []
+    for size in sizes:
+        width = height = size
+        runs = []
+        if 'tick' in cases:
+            runs.append(('tick', lambda: bench_tick(width, height, repeat)))
+        if 'spawn_food' in cases:
+            for ratio in FILL_RATIOS:
+                runs.append(('spawn_food', lambda ratio=ratio: bench_spawn_food(width, height, repeat, ratio)))
+        if 'cycle' in cases:
+            runs.append(('cycle', lambda: bench_cycle(width, height, repeat)))
+        if 'a_star' in cases:
+            runs.append(('a_star', lambda: bench_a_star(width, height, repeat)))
+        if 'planner' in cases:
+            for name in PLANNERS:
+                runs.append(('planner', lambda name=name: bench_planner(width, height, repeat, name)))
+        if 'genome' in cases:
+            runs.append(('genome', lambda: bench_genome(width, height, repeat, config)))
+        if 'batch_network' in cases:
+            runs.append(('batch_network', lambda: bench_batch_network(width, height, repeat, config)))
+
+        for case, bench in runs:
+            params, stats = bench()
+            result = {'case': case, 'width': width, 'height': height, **params, **stats}
+            print(json.dumps(result))
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the game hot paths")
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--config', default='./config-feedforward.txt')
+    parser.add_argument('--output', default='bench_output.json')
+    args = parser.parse_args()
+
+    results = run(args.cases, args.sizes, args.repeat, args.config)
+    with open(args.output, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'repeat': args.repeat,
+            'results': results,
+        }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,26 @@
-import neat
-import pygame
+import argparse
+import sys
 
-import app.gui.manual
-import app.gui.neat
-import app.gui.hamilton
+from app.planners import PLANNERS
 
+# Тяжёлые модули (pygame, neat, numpy) импортируются внутри режимов, которым они нужны:
+# пакетные прогоны и процессы-воркеры не платят за их загрузку
 
-def run_manual():
-    app.gui.manual.main()
+CONFIG_PATH = "./config-feedforward.txt"
+GENERATIONS = 1000
 
 
-def run_generation():
+def run_manual(width=None, height=None, seed=None):
+    import app.gui.manual
+    app.gui.manual.main(width, height, seed)
+
+
+def run_generation(headless=False, workers=1, config_path=CONFIG_PATH, width=None, height=None, seed=None):
+    import neat
+
+    import app.generation
+
     # setup config
-    config_path = "./config-feedforward.txt"
     config = neat.config.Config(
         neat.DefaultGenome,
         neat.DefaultReproduction,
@@ -20,20 +28,123 @@ def run_generation():
         neat.DefaultStagnation,
         config_path
     )
+    if seed is not None:
+        app.generation.base_seed = seed
+    # Размер поля задаётся только без окна: в окне поле занимает весь экран
+    width = width or app.generation.BOARD_WIDTH
+    height = height or app.generation.BOARD_HEIGHT
 
     # init NEAT
     p = neat.Population(config)
 
     # run NEAT
     print("Running NEAT")
-    p.run(app.gui.neat.run_generation, 1000)
+    if workers > 1:
+        with app.generation.ParallelEvaluator(workers, width, height, seed=app.generation.base_seed) as evaluator:
+            p.run(evaluator, GENERATIONS)
+    elif headless:
+        p.run(lambda genomes, config: app.generation.run_generation(genomes, config, width, height), GENERATIONS)
+    else:
+        import app.gui.neat
+        p.run(app.gui.neat.run_generation, GENERATIONS)
     print("NEAT finished")
 
 
-def run_hamilton():
-    app.gui.hamilton.main()
+def run_hamilton(width=40, height=20, seed=None, planner=None):
+    import app.gui.hamilton
+    app.gui.hamilton.main(width, height, seed, PLANNERS[planner]() if planner else None)
+
+
+def run_hamilton_batch(sizes=None, games=None, planner='a_star', workers=None, seed=0, replays=None):
+    import app.hamilton_batch
+    app.hamilton_batch.run_batch(
+        sizes or app.hamilton_batch.SIZES,
+        games or app.hamilton_batch.GAMES_PER_SIZE,
+        planner,
+        workers,
+        seed,
+        replay_dir=replays,
+    )
+
+
+def run_replay(path, speed=None):
+    import app.gui.replay
+    if speed:
+        app.gui.replay.main(path, speed)
+    else:
+        app.gui.replay.main(path)
+
+
+def quit_pygame():
+    # pygame загружен, только если режим открывал окно
+    pygame = sys.modules.get('pygame')
+    if pygame is not None:
+        pygame.quit()
+
+
+def create_parser() -> argparse.ArgumentParser:
+    board = argparse.ArgumentParser(add_help=False)
+    board.add_argument('--width', type=int, default=None, help="board width in cells")
+    board.add_argument('--height', type=int, default=None, help="board height in cells")
+    board.add_argument('--seed', type=int, default=None)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--profile', default=None, metavar='PATH',
+                        help="write profiling summaries of this process to PATH (see app/profiling.py)")
+
+    parser = argparse.ArgumentParser(description="Snake")
+    modes = parser.add_subparsers(dest='mode', required=True)
+
+    modes.add_parser('manual', parents=[board, common], help="play with the keyboard")
+
+    generation = modes.add_parser('generation', parents=[board, common], help="train snakes with NEAT")
+    generation.add_argument('--headless', action='store_true', help="train without a window")
+    generation.add_argument('--workers', type=int, default=1, help="evaluate the population on N processes")
+    generation.add_argument('--config', default=CONFIG_PATH, help="NEAT config path")
+
+    hamilton = modes.add_parser('hamilton', parents=[board, common], help="watch the Hamiltonian cycle snake")
+    hamilton.add_argument('--planner', choices=list(PLANNERS), default=None, help="default: threaded")
+
+    batch = modes.add_parser('hamilton-batch', parents=[common], help="play many Hamiltonian games without a window")
+    batch.add_argument('--sizes', nargs='+', type=int, default=None)
+    batch.add_argument('--games', type=int, default=None, help="games per board size")
+    batch.add_argument('--planner', choices=[name for name, planner in PLANNERS.items() if planner.is_deterministic],
+                       default='a_star')
+    batch.add_argument('--workers', type=int, default=None)
+    batch.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    batch.add_argument('--replays', default=None, help="directory for replays of failed and stalled games")
+
+    replay = modes.add_parser('replay', parents=[common], help="play a recorded game")
+    replay.add_argument('path')
+    replay.add_argument('--speed', type=int, default=None, help="ticks per second")
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Без аргументов запускаем гамильтонову змейку, как раньше
+    args = create_parser().parse_args(argv or ['hamilton'])
+
+    if args.profile:
+        from app import profiling
+        profiling.enable(args.profile)
+
+    try:
+        if args.mode == 'manual':
+            run_manual(args.width, args.height, args.seed)
+        elif args.mode == 'generation':
+            run_generation(args.headless, args.workers, args.config, args.width, args.height, args.seed)
+        elif args.mode == 'hamilton':
+            run_hamilton(args.width or 40, args.height or 20, args.seed, args.planner)
+        elif args.mode == 'hamilton-batch':
+            run_hamilton_batch(args.sizes, args.games, args.planner, args.workers, args.seed, args.replays)
+        elif args.mode == 'replay':
+            run_replay(args.path, args.speed)
+    finally:
+        if args.profile:
+            profiling.disable()
+        quit_pygame()
 
 
 if __name__ == '__main__':
-    run_hamilton()
-    pygame.quit()
+    main()
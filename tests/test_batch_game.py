@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from app.batch_game import BatchGame, DIRECTIONS, NO_ACTION
+from app.game_core import Direction, Snake, TCoord
+from app.generation import GenerationGame
+
+WIDTH = 6
+HEIGHT = 4
+GAMES = 16
+# Меньше MAX_TICKS_WITHOUT_FOOD, чтобы GenerationGame не завершала партии по голоду
+TICKS = 250
+
+
+def serpentine_directions(width, height) -> dict[TCoord, Direction]:
+    # Гамильтонов цикл из (0, 0): вправо по верхней строке, змейкой по столбцам 1..width-1 и вверх по нулевому
+    cells = [(x, 0) for x in range(width)]
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 else range(1, width)
+        cells.extend((x, y) for x in xs)
+    cells.extend((0, y) for y in range(height - 1, 0, -1))
+
+    directions = {}
+    for (x, y), (next_x, next_y) in zip(cells, cells[1:] + cells[:1]):
+        directions[(x, y)] = {
+            (0, -1): Direction.UP,
+            (0, 1): Direction.DOWN,
+            (-1, 0): Direction.LEFT,
+            (1, 0): Direction.RIGHT,
+        }[(next_x - x, next_y - y)]
+    return directions
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_batch_game_matches_game(seed):
+    batch = BatchGame(GAMES, WIDTH, HEIGHT, seed=seed)
+    games = []
+    for i in range(GAMES):
+        game = GenerationGame(WIDTH, HEIGHT, seed=seed)
+        game.add_snake(Snake())
+        games.append(game)
+
+    # Ходы по циклу с редкими случайными поворотами: часть змеек растёт до конца, часть разбивается
+    directions = serpentine_directions(WIDTH, HEIGHT)
+    rng = random.Random(seed)
+    for _ in range(TICKS):
+        # Еду движки выбирают разными ГСЧ, поэтому игре отдаём еду пакетной игры
+        for i, game in enumerate(games):
+            if not game.is_over:
+                assert batch.get_food(i) not in game.snake.body
+                game.food = batch.get_food(i)
+
+        data = batch.get_data()
+        actions = []
+        for i, game in enumerate(games):
+            if not game.is_over:
+                assert list(data[i]) == game.get_data()
+            if game.is_over:
+                actions.append(NO_ACTION)
+            elif rng.random() < 0.97:
+                actions.append(directions[game.snake.body[0]])
+            else:
+                actions.append(rng.choice(DIRECTIONS))
+
+        alive = batch.step(actions)
+        for i, game in enumerate(games):
+            if game.is_over:
+                continue
+            game.snake.change_direction(DIRECTIONS[actions[i]])
+            assert game.tick() == alive[i]
+            assert game.is_over == batch.is_over[i]
+            assert len(game.snake.body) == batch.length[i]
+            if not game.is_over:
+                assert list(game.snake.body) == batch.get_body(i)
+
+    # Проверка не вырождена: есть и разбившиеся змейки, и заполнившие всё поле
+    assert (batch.length < WIDTH * HEIGHT).any()
+    assert (batch.length == WIDTH * HEIGHT).any()
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from app.cycle_cache import HEADER, CycleCache
+from app.hamilton_game import HamiltonGame
+from app.hamiltonian_cycle import HamiltonianCycle
+
+WIDTH = 8
+HEIGHT = 6
+
+
+def assert_same_cycle(hc: HamiltonianCycle, loaded: HamiltonianCycle):
+    assert (loaded.width, loaded.height, loaded.seed) == (hc.width, hc.height, hc.seed)
+    assert list(loaded.get_order()) == list(hc.get_order())
+    assert list(loaded.node_nos) == list(hc.node_nos)
+    for node_no in range(WIDTH * HEIGHT):
+        assert loaded.get_neighbour_node_nos(node_no) == hc.get_neighbour_node_nos(node_no)
+    for x in range(WIDTH):
+        for y in range(HEIGHT):
+            assert loaded.get_node_no(x, y) == hc.get_node_no(x, y)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_cycle_cache_round_trip(tmp_path, seed):
+    cache = CycleCache(str(tmp_path))
+    assert cache.load(WIDTH, HEIGHT, seed) is None
+
+    hc = HamiltonianCycle(WIDTH, HEIGHT, seed=seed)
+    path = cache.save(hc)
+    assert os.path.exists(path)
+    assert cache.seeds(WIDTH, HEIGHT) == [seed]
+    assert_same_cycle(hc, cache.load(WIDTH, HEIGHT, seed))
+
+
+def test_cycle_cache_get_builds_and_saves(tmp_path):
+    cache = CycleCache(str(tmp_path))
+    hc = cache.get(WIDTH, HEIGHT, 7)
+    assert os.path.exists(cache.path_for(WIDTH, HEIGHT, 7))
+    assert_same_cycle(HamiltonianCycle(WIDTH, HEIGHT, seed=7), hc)
+    assert_same_cycle(hc, cache.get(WIDTH, HEIGHT, 7))
+
+
+@pytest.mark.parametrize('game_seed', range(3))
+def test_cycle_cache_get_for_game(tmp_path, game_seed):
+    # Кэш отдаёт тот же цикл, который игра с этим сидом построила бы сама
+    cache = CycleCache(str(tmp_path))
+    game = HamiltonGame(WIDTH, HEIGHT, seed=game_seed)
+    assert_same_cycle(game.hc, cache.get_for_game(WIDTH, HEIGHT, game_seed))
+    assert_same_cycle(game.hc, cache.get_for_game(WIDTH, HEIGHT, game_seed))
+
+
+def test_cycle_cache_header_mismatch(tmp_path):
+    cache = CycleCache(str(tmp_path))
+    path = cache.save(HamiltonianCycle(WIDTH, HEIGHT, seed=1))
+
+    # Файл под чужим сидом: заголовок не совпадает с запрошенным
+    os.replace(path, cache.path_for(WIDTH, HEIGHT, 2))
+    with pytest.raises(ValueError):
+        cache.load(WIDTH, HEIGHT, 2)
+
+    path = cache.save(HamiltonianCycle(WIDTH, HEIGHT, seed=1))
+    with open(path, 'r+b') as f:
+        f.write(b'JUNK')
+    with pytest.raises(ValueError):
+        cache.load(WIDTH, HEIGHT, 1)
+
+
+@pytest.mark.parametrize('length', [0, 10, HEADER.size, HEADER.size + 4, -4])
+def test_cycle_cache_truncated(tmp_path, length):
+    cache = CycleCache(str(tmp_path))
+    path = cache.save(HamiltonianCycle(WIDTH, HEIGHT, seed=1))
+
+    with open(path, 'r+b') as f:
+        f.truncate(length if length >= 0 else os.path.getsize(path) + length)
+    with pytest.raises(ValueError):
+        cache.load(WIDTH, HEIGHT, 1)
+
+
+def test_cycle_cache_random_cycle(tmp_path):
+    cache = CycleCache(str(tmp_path))
+
+    # Пустой пул: строится и сохраняется цикл для сида игры
+    hc = cache.random_cycle(WIDTH, HEIGHT, 5)
+    assert_same_cycle(HamiltonGame(WIDTH, HEIGHT, seed=5).hc, hc)
+    assert cache.seeds(WIDTH, HEIGHT) == [hc.seed]
+
+    # Непустой пул: новые циклы не строятся, сколько бы разных сидов игры ни было
+    pool = cache.seeds(WIDTH, HEIGHT) + [cache.get(WIDTH, HEIGHT, seed).seed for seed in range(3)]
+    picked = {cache.random_cycle(WIDTH, HEIGHT, game_seed).seed for game_seed in range(20)}
+    assert cache.seeds(WIDTH, HEIGHT) == sorted(pool)
+    assert picked <= set(pool)
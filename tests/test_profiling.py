@@ -0,0 +1,33 @@
+import os
+
+import neat
+
+from app import profiling
+from app.generation import ParallelEvaluator
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config-feedforward.txt')
+
+
+def test_parallel_generation_profiles_workers(tmp_path):
+    config = neat.config.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        CONFIG_PATH
+    )
+    genomes = list(neat.Population(config).population.items())
+
+    report_path = tmp_path / 'profile.jsonl'
+    profiling.enable(str(report_path), None)
+    try:
+        with ParallelEvaluator(2, 10, 10, seed=0) as evaluator:
+            evaluator(genomes, config)
+    finally:
+        summary = profiling.disable()
+
+    # Тики идут только в воркерах: без их замеров сводка была бы пустой
+    assert summary['stages']['game.tick']['count'] > 0
+    assert summary['ticks_per_s'] > 0
+    # Воркеры не пишут в файл родителя: в нём одна итоговая сводка
+    assert len(report_path.read_text().splitlines()) == 1
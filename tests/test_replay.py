@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from app.game_core import OPPOSITE, Direction, Game, Snake
+from app.replay import Replay, ReplayWriter, play
+
+WIDTH = 8
+HEIGHT = 5
+
+
+def record(path, seed, max_ticks, buffer_size=1) -> tuple[Game, list[Direction]]:
+    # Та же последовательность, что и в Replay.create_game
+    game = Game(WIDTH, HEIGHT, seed=seed)
+    game.add_snake(Snake())
+    game.spawn_food()
+
+    # Случайные повороты без разворотов назад, пока змейка не разобьётся или не кончатся тики
+    rng = random.Random(seed)
+    directions = []
+    with ReplayWriter(str(path), game, buffer_size=buffer_size):
+        while not game.is_over and len(directions) < max_ticks:
+            direction = game.snake.direction
+            if rng.random() < 0.3:
+                direction = rng.choice([d for d in Direction if d != OPPOSITE[direction]])
+            game.snake.change_direction(direction)
+            game.tick()
+            directions.append(game.snake.direction)
+    return game, directions
+
+
+@pytest.mark.parametrize('max_ticks', [0, 1, 3, 4, 5, 7, 9, 1000])
+@pytest.mark.parametrize('seed', range(3))
+def test_replay_round_trip(tmp_path, seed, max_ticks):
+    path = tmp_path / 'game.replay'
+    game, directions = record(path, seed, max_ticks)
+
+    replay = Replay(str(path))
+    assert (replay.width, replay.height, replay.seed) == (WIDTH, HEIGHT, seed)
+    assert replay.body == [(0, 0)]
+    assert replay.ticks == len(directions)
+    assert list(replay.directions()) == directions
+    assert list(replay.directions(chunk_size=1)) == directions
+
+    replayed = replay.create_game()
+    for _ in play(replay, replayed):
+        pass
+    assert list(replayed.snake.body) == list(game.snake.body)
+    assert replayed.food == game.food
+    assert replayed.is_over == game.is_over
+
+
+def test_replay_truncated(tmp_path):
+    path = tmp_path / 'game.replay'
+    _, directions = record(path, seed=0, max_ticks=9)
+    assert directions
+
+    data = path.read_bytes()
+    # Выбрасываем последний байт ходов, оставляя футер на месте
+    path.write_bytes(data[:-9] + data[-8:])
+    with pytest.raises(ValueError):
+        Replay(str(path))
+
+
+def test_replay_bad_magic(tmp_path):
+    path = tmp_path / 'game.replay'
+    record(path, seed=0, max_ticks=4)
+
+    data = path.read_bytes()
+    path.write_bytes(b'JUNK' + data[4:])
+    with pytest.raises(ValueError):
+        Replay(str(path))